@@ -356,7 +356,7 @@ def dock(ctx, targets, compounds, prepare_only):
     
     console.print("[cyan]Molecular Docking Analysis[/cyan]\n")
     
-    from .docking.docker import MolecularDocker
+    from .docking.docker import MolecularDocker, HAS_PYARROW
     
     docker = MolecularDocker(config)
     
@@ -385,6 +385,9 @@ def dock(ctx, targets, compounds, prepare_only):
             console.print(f"  [green]✓[/green] Completed {len(results)} docking runs")
             
             docker.save_results()
+            # Without pyarrow the Parquet writer would only repeat the CSV above
+            if HAS_PYARROW:
+                docker.save_results_parquet()
     
     console.print(f"\n[green]Docking analysis complete![/green]")
 
@@ -19,9 +19,10 @@ Usage:
     python -m src.docking.step5_analyze --results docking_results.json
 """
 
-from .docker import MolecularDocker, DockingResult
+from .docker import MolecularDocker, DockingResult, DockingTable
 
 __all__ = [
     "MolecularDocker", 
     "DockingResult",
+    "DockingTable",
 ]
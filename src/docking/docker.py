@@ -12,13 +12,17 @@ Requirements:
 """
 
 import os
+import re
 import subprocess
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
+from array import array
 import tempfile
 import shutil
+from ..http_utils import make_session
 
 try:
     from rdkit import Chem
@@ -28,6 +32,59 @@ except ImportError:
     HAS_RDKIT = False
     print("Warning: RDKit not installed. Ligand preparation will be limited.")
 
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Row of the Vina energy table: mode, affinity, rmsd l.b., rmsd u.b.
+_VINA_ROW = re.compile(rb'^\s*(\d+)\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)', re.M)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _centroid(coords: np.ndarray) -> np.ndarray:
+        """Mean of an (N, 3) coordinate array, reduced in parallel."""
+        sx = 0.0
+        sy = 0.0
+        sz = 0.0
+        for i in prange(coords.shape[0]):
+            sx += coords[i, 0]
+            sy += coords[i, 1]
+            sz += coords[i, 2]
+        n = coords.shape[0]
+        return np.array([sx / n, sy / n, sz / n])
+else:
+    def _centroid(coords: np.ndarray) -> np.ndarray:
+        """Mean of an (N, 3) coordinate array."""
+        return coords.mean(axis=0)
+
+# Shared keep-alive session for structure downloads
+_HTTP = make_session(max_retries=0)
+
+# Manual mapping for common DN targets
+_PDB_MAPPING = {
+    "PPARG": "2PRG",  # PPAR-gamma
+    "HMGCR": "1HWK",  # HMG-CoA reductase
+    "AGTR1": "4YAY",  # Angiotensin II receptor type 1
+    "RELA": "1NFI",   # NF-kB p65
+    "KDR": "4AGD",    # VEGFR2
+    "PDE5A": "1UDT",  # Phosphodiesterase 5A
+    "ADORA2A": "3EML",# Adenosine A2A receptor
+    "ADORA2B": "5MZP",# Adenosine A2B receptor
+    "SERPINE1": "1DVN",# PAI-1
+    "SLC5A2": "7VSI", # SGLT2
+    "VDR": "1DB1",    # Vitamin D receptor
+    "AXL": "5U6B",    # AXL kinase
+}
+
 
 @dataclass
 class DockingResult:
@@ -40,6 +97,66 @@ class DockingResult:
     rmsd_ub: float = 0.0
 
 
+class DockingTable:
+    """
+    Columnar store of docking poses.
+    
+    Keeps one parallel column per field instead of a list of DockingResult
+    objects, so large screens stay compact and convert to a DataFrame
+    without building per-row dicts.
+    """
+    
+    def __init__(self):
+        self.compound: List[str] = []
+        self.target: List[str] = []
+        self.affinity = array('f')
+        self.rmsd_lb = array('f')
+        self.rmsd_ub = array('f')
+    
+    def __len__(self) -> int:
+        return len(self.compound)
+    
+    def __iter__(self) -> Iterator[DockingResult]:
+        for i in range(len(self)):
+            yield DockingResult(
+                compound_name=self.compound[i],
+                target_name=self.target[i],
+                binding_affinity=self.affinity[i],
+                rmsd_lb=self.rmsd_lb[i],
+                rmsd_ub=self.rmsd_ub[i]
+            )
+    
+    def append(
+        self,
+        compound: str,
+        target: str,
+        affinity: float,
+        rmsd_lb: float = 0.0,
+        rmsd_ub: float = 0.0
+    ) -> None:
+        """Append a single pose."""
+        self.compound.append(compound)
+        self.target.append(target)
+        self.affinity.append(affinity)
+        self.rmsd_lb.append(rmsd_lb)
+        self.rmsd_ub.append(rmsd_ub)
+    
+    def extend(self, results: Iterable[DockingResult]) -> None:
+        """Append poses from DockingResult objects."""
+        for r in results:
+            self.append(r.compound_name, r.target_name, r.binding_affinity, r.rmsd_lb, r.rmsd_ub)
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """Return the poses as a DataFrame."""
+        return pd.DataFrame({
+            "compound": self.compound,
+            "target": self.target,
+            "binding_affinity": np.frombuffer(self.affinity, dtype=np.float32).copy(),
+            "rmsd_lb": np.frombuffer(self.rmsd_lb, dtype=np.float32).copy(),
+            "rmsd_ub": np.frombuffer(self.rmsd_ub, dtype=np.float32).copy()
+        })
+
+
 class MolecularDocker:
     """
     Performs molecular docking using AutoDock Vina.
@@ -50,6 +167,7 @@ class MolecularDocker:
         docker.prepare_receptors()
         results = docker.run_docking()
         docker.save_results()
+        docker.save_results_parquet()
     """
     
     def __init__(self, config):
@@ -77,8 +195,13 @@ class MolecularDocker:
         self.num_modes = config.get("docking.num_modes", 9)
         self.energy_range = config.get("docking.energy_range", 3)
         
+        # Ligand force field: "MMFF" (default, higher fidelity) or "UFF"
+        # (faster per step, suited to large screens where throughput matters)
+        self.ligand_ff = str(config.get("docking.ligand_ff", "MMFF")).upper()
+        self.ligand_max_iters = config.get("docking.ligand_max_iters", 200)
+        
         # Results storage
-        self.docking_results: List[DockingResult] = []
+        self.docking_results = DockingTable()
         self.prepared_ligands: Dict[str, Path] = {}
         self.prepared_receptors: Dict[str, Path] = {}
     
@@ -129,7 +252,10 @@ class MolecularDocker:
                 return None
             
             # Optimize geometry
-            AllChem.MMFFOptimizeMolecule(mol, maxIters=200)
+            if self.ligand_ff == "UFF":
+                AllChem.UFFOptimizeMolecule(mol, maxIters=self.ligand_max_iters)
+            else:
+                AllChem.MMFFOptimizeMolecule(mol, maxIters=self.ligand_max_iters)
             
             # Save as PDB first
             pdb_file = output_dir / f"{name}.pdb"
@@ -215,14 +341,14 @@ class MolecularDocker:
         Returns:
             Path to cleaned PDB file
         """
-        import urllib.request
-        
         pdb_file = self.receptor_dir / f"{pdb_id}.pdb"
         
         if not pdb_file.exists():
             url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
             try:
-                urllib.request.urlretrieve(url, pdb_file)
+                with _HTTP.get(url, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    pdb_file.write_bytes(response.content)
                 print(f"Downloaded {pdb_id} from PDB")
             except Exception as e:
                 print(f"Failed to download {pdb_id}: {e}")
@@ -279,27 +405,29 @@ class MolecularDocker:
         Returns:
             Dictionary with center_x, center_y, center_z, size_x, size_y, size_z
         """
-        coords = []
+        with open(pdb_file, 'rb') as f:
+            rows = [line[30:54] for line in f if line.startswith((b'ATOM', b'HETATM'))]
         
-        with open(pdb_file, 'r') as f:
-            for line in f:
-                if line.startswith(('ATOM', 'HETATM')):
-                    try:
-                        x = float(line[30:38])
-                        y = float(line[38:46])
-                        z = float(line[46:54])
-                        coords.append((x, y, z))
-                    except ValueError:
-                        continue
+        # Split the fixed-width x/y/z columns with a view and parse them in
+        # one NumPy cast; malformed files fall back to a per-row parse that
+        # skips rows with bad coordinates
+        try:
+            coords = np.array(rows, dtype="S24").view("S8").reshape(-1, 3).astype(np.float64)
+        except ValueError:
+            coords = []
+            for row in rows:
+                try:
+                    coords.append((float(row[0:8]), float(row[8:16]), float(row[16:24])))
+                except ValueError:
+                    continue
+            coords = np.array(coords, dtype=np.float64).reshape(-1, 3)
         
-        if not coords:
+        if len(coords) == 0:
             return {"center_x": 0, "center_y": 0, "center_z": 0,
                     "size_x": 30, "size_y": 30, "size_z": 30}
         
         # Calculate center
-        center_x = sum(c[0] for c in coords) / len(coords)
-        center_y = sum(c[1] for c in coords) / len(coords)
-        center_z = sum(c[2] for c in coords) / len(coords)
+        center_x, center_y, center_z = (float(c) for c in _centroid(coords))
         
         # Default box size (can be refined based on known binding site)
         return {
@@ -373,31 +501,21 @@ class MolecularDocker:
         if not log_file.exists():
             return results
         
-        with open(log_file, 'r') as f:
-            in_results = False
-            for line in f:
-                if "-----+------------" in line:
-                    in_results = True
-                    continue
-                
-                if in_results and line.strip():
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        try:
-                            mode = int(parts[0])
-                            affinity = float(parts[1])
-                            rmsd_lb = float(parts[2])
-                            rmsd_ub = float(parts[3])
-                            
-                            results.append(DockingResult(
-                                compound_name=ligand_name,
-                                target_name=receptor_name,
-                                binding_affinity=affinity,
-                                rmsd_lb=rmsd_lb,
-                                rmsd_ub=rmsd_ub
-                            ))
-                        except (ValueError, IndexError):
-                            continue
+        buf = log_file.read_bytes()
+        
+        # Only scan the energy table that follows the separator line
+        start = buf.find(b"-----+------------")
+        if start == -1:
+            return results
+        
+        for m in _VINA_ROW.finditer(buf, start):
+            results.append(DockingResult(
+                compound_name=ligand_name,
+                target_name=receptor_name,
+                binding_affinity=float(m.group(2)),
+                rmsd_lb=float(m.group(3)),
+                rmsd_ub=float(m.group(4))
+            ))
         
         return results
     
@@ -405,7 +523,7 @@ class MolecularDocker:
         self,
         target_genes: Optional[List[str]] = None,
         top_compounds: Optional[List[str]] = None
-    ) -> List[DockingResult]:
+    ) -> DockingTable:
         """
         Run docking for selected targets and compounds.
         
@@ -414,7 +532,7 @@ class MolecularDocker:
             top_compounds: List of compound names to dock
             
         Returns:
-            List of all docking results
+            DockingTable with all docking poses
         """
         # Load hub genes if not specified
         if target_genes is None:
@@ -424,7 +542,7 @@ class MolecularDocker:
                 target_genes = df['gene'].head(5).tolist()  # Top 5 hub genes
             else:
                 print("No hub genes file found")
-                return []
+                return DockingTable()
         
         # Load drug-like compounds if not specified
         if top_compounds is None:
@@ -438,89 +556,125 @@ class MolecularDocker:
         
         print(f"Running docking: {len(top_compounds)} compounds × {len(target_genes)} targets")
         
-        all_results = []
+        all_results = DockingTable()
         
-        for target in target_genes:
-            # Get PDB structure for target (would need mapping)
-            pdb_id = self._get_pdb_for_gene(target)
-            if not pdb_id:
-                print(f"No PDB structure found for {target}")
-                continue
-            
-            # Download and prepare receptor
-            pdb_file = self.download_receptor(pdb_id)
-            if not pdb_file:
-                continue
+        # Stage ligands once on tmpfs so every target reuses the same in-memory copies
+        with self._make_staging_dir() as staging_name:
+            staged_ligands = self._stage_ligands(top_compounds, Path(staging_name))
             
-            receptor_pdbqt = self.prepare_receptor(pdb_file, target)
-            if not receptor_pdbqt:
-                continue
-            
-            # Get binding site
-            binding_site = self.get_binding_site(pdb_file)
-            
-            # Dock each compound
-            for compound in top_compounds:
-                if compound not in self.prepared_ligands:
+            for target in target_genes:
+                # Get PDB structure for target (would need mapping)
+                pdb_id = self._get_pdb_for_gene(target)
+                if not pdb_id:
+                    print(f"No PDB structure found for {target}")
                     continue
                 
-                ligand_pdbqt = self.prepared_ligands[compound]
-                output_file = self.output_dir / f"{compound}_{target}.pdbqt"
+                # Download and prepare receptor
+                pdb_file = self.download_receptor(pdb_id)
+                if not pdb_file:
+                    continue
                 
-                print(f"  Docking {compound} → {target}...")
-                results = self.run_vina(receptor_pdbqt, ligand_pdbqt, output_file, binding_site)
+                receptor_pdbqt = self.prepare_receptor(pdb_file, target)
+                if not receptor_pdbqt:
+                    continue
+                
+                # Get binding site
+                binding_site = self.get_binding_site(pdb_file)
                 
-                if results:
-                    all_results.extend(results)
-                    print(f"    Best affinity: {results[0].binding_affinity:.2f} kcal/mol")
+                # Dock each compound
+                for compound in top_compounds:
+                    if compound not in staged_ligands:
+                        continue
+                    
+                    ligand_pdbqt = staged_ligands[compound]
+                    output_file = self.output_dir / f"{compound}_{target}.pdbqt"
+                    
+                    print(f"  Docking {compound} → {target}...")
+                    results = self.run_vina(receptor_pdbqt, ligand_pdbqt, output_file, binding_site)
+                    
+                    if results:
+                        all_results.extend(results)
+                        print(f"    Best affinity: {results[0].binding_affinity:.2f} kcal/mol")
         
         self.docking_results = all_results
         return all_results
     
+    def _make_staging_dir(self) -> tempfile.TemporaryDirectory:
+        """Create a scratch directory, on /dev/shm when available."""
+        shm = Path("/dev/shm")
+        return tempfile.TemporaryDirectory(
+            prefix="docking_ligands_",
+            dir=str(shm) if shm.is_dir() and os.access(shm, os.W_OK) else None
+        )
+    
+    def _stage_ligands(self, compounds: List[str], staging_dir: Path) -> Dict[str, Path]:
+        """
+        Copy prepared ligand PDBQT files into the staging directory.
+        
+        Each ligand is read from disk once and reused for all targets.
+        File names are kept so Vina results still carry the ligand stem.
+        
+        Returns:
+            Dictionary mapping compound names to staged PDBQT paths
+        """
+        staged = {}
+        for compound in compounds:
+            source = self.prepared_ligands.get(compound)
+            if source is None or not source.exists():
+                continue
+            
+            staged_path = staging_dir / source.name
+            shutil.copyfile(source, staged_path)
+            staged[compound] = staged_path
+        
+        return staged
+    
     def _get_pdb_for_gene(self, gene_symbol: str) -> Optional[str]:
         """
         Get PDB ID for a gene symbol.
         
         This is a simplified mapping. In production, use UniProt or PDB API.
         """
-        # Manual mapping for common DN targets
-        pdb_mapping = {
-            "PPARG": "2PRG",  # PPAR-gamma
-            "HMGCR": "1HWK",  # HMG-CoA reductase
-            "AGTR1": "4YAY",  # Angiotensin II receptor type 1
-            "RELA": "1NFI",   # NF-kB p65
-            "KDR": "4AGD",    # VEGFR2
-            "PDE5A": "1UDT",  # Phosphodiesterase 5A
-            "ADORA2A": "3EML",# Adenosine A2A receptor
-            "ADORA2B": "5MZP",# Adenosine A2B receptor
-            "SERPINE1": "1DVN",# PAI-1
-            "SLC5A2": "7VSI", # SGLT2
-            "VDR": "1DB1",    # Vitamin D receptor
-            "AXL": "5U6B",    # AXL kinase
-        }
-        return pdb_mapping.get(gene_symbol)
+        return _PDB_MAPPING.get(gene_symbol)
+    
+    def _results_frame(self) -> pd.DataFrame:
+        """Docking results as a DataFrame sorted by binding affinity."""
+        df = self.docking_results.to_dataframe().rename(
+            columns={"binding_affinity": "binding_affinity_kcal_mol"}
+        )
+        
+        # Sort by binding affinity (more negative = better)
+        return df.sort_values("binding_affinity_kcal_mol", kind="stable")
     
     def save_results(self, output_file: Optional[Path] = None) -> Path:
         """Save docking results to CSV."""
         if output_file is None:
             output_file = self.results_dir / "docking_results.csv"
         
-        data = []
-        for r in self.docking_results:
-            data.append({
-                "compound": r.compound_name,
-                "target": r.target_name,
-                "binding_affinity_kcal_mol": r.binding_affinity,
-                "rmsd_lb": r.rmsd_lb,
-                "rmsd_ub": r.rmsd_ub
-            })
+        # Vina reports three decimals; rounding hides the float32 storage
+        df = self._results_frame()
+        df.to_csv(output_file, index=False, float_format="%.3f")
+        print(f"Results saved to: {output_file}")
+        
+        return output_file
+    
+    def save_results_parquet(self, output_file: Optional[Path] = None) -> Path:
+        """
+        Save docking results to Parquet (zstd-compressed).
         
-        df = pd.DataFrame(data)
+        Parquet keeps the float32 columns typed and dictionary-encodes the
+        compound/target names, so downstream notebooks load it much faster
+        than the CSV. Falls back to CSV when pyarrow is not installed.
+        """
+        if not HAS_PYARROW:
+            print("pyarrow not installed, saving CSV instead")
+            return self.save_results()
         
-        # Sort by binding affinity (more negative = better)
-        df = df.sort_values("binding_affinity_kcal_mol")
+        if output_file is None:
+            output_file = self.results_dir / "docking_results.parquet"
         
-        df.to_csv(output_file, index=False)
+        df = self._results_frame()
+        df.to_parquet(output_file, engine="pyarrow", compression="zstd", index=False)
         print(f"Results saved to: {output_file}")
         
         return output_file
@@ -530,16 +684,10 @@ class MolecularDocker:
         if not self.docking_results:
             return pd.DataFrame()
         
-        df = pd.DataFrame([
-            {
-                "compound": r.compound_name,
-                "target": r.target_name,
-                "binding_affinity": r.binding_affinity
-            }
-            for r in self.docking_results
-        ])
+        df = self.docking_results.to_dataframe()[["compound", "target", "binding_affinity"]]
         
         # Get best pose per compound-target pair
-        df = df.sort_values("binding_affinity").groupby(["compound", "target"]).first().reset_index()
+        best_idx = df.groupby(["compound", "target"], sort=False)["binding_affinity"].idxmin()
+        df = df.loc[best_idx].sort_values("binding_affinity").reset_index(drop=True)
         
         return df.head(top_n)
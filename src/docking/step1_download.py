@@ -10,11 +10,14 @@ Usage:
 """
 
 import os
-import urllib.request
 from pathlib import Path
 from typing import Dict, List, Optional
 import yaml
 import click
+from ..http_utils import make_session
+
+# Shared keep-alive session so consecutive downloads reuse the TLS connection
+_HTTP = make_session(max_retries=0)
 
 
 def download_pdb(pdb_id: str, output_dir: Path) -> Optional[Path]:
@@ -39,7 +42,9 @@ def download_pdb(pdb_id: str, output_dir: Path) -> Optional[Path]:
     
     try:
         print(f"  📥 Downloading {pdb_id} from RCSB...")
-        urllib.request.urlretrieve(url, pdb_file)
+        with _HTTP.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            pdb_file.write_bytes(response.content)
         print(f"  ✅ Saved to {pdb_file}")
         return pdb_file
     except Exception as e:
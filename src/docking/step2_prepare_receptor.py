@@ -13,10 +13,19 @@ Usage:
 """
 
 import os
+import functools
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
 import click
 
+try:
+    from openbabel import pybel
+    HAS_PYBEL = True
+except ImportError:
+    HAS_PYBEL = False
+
 
 # Common solvents, buffers, and crystallization artifacts to exclude
 # These are NOT drug-like ligands and should be skipped for binding site
@@ -32,58 +41,161 @@ COMMON_SOLVENTS = {
     'DOD', 'UNX', 'UNL', 'UNK',  # unknown/dummy atoms
 }
 
+METAL_RESIDUES = {'ZN', 'MG', 'CA', 'FE', 'MN', 'CU', 'NA', 'K', 'CL'}
+
+# Fixed record width of the PDB format
+PDB_LINE_WIDTH = 80
+
+
+@dataclass(frozen=True)
+class ParsedPDB:
+    """
+    Column view of a PDB file, parsed once and shared by all step 2 functions.
+    
+    Every array has one row per line. ``xyz`` is NaN for lines that are not
+    ATOM/HETATM records. Arrays are read-only because they are cached.
+    """
+    lines: np.ndarray
+    record: np.ndarray
+    res_names: np.ndarray
+    chain_ids: np.ndarray
+    xyz: np.ndarray
+
+
+def _read_pdb_lines(pdb_file: Path) -> np.ndarray:
+    """Read a PDB file into a fixed-width byte-string array, one element per line."""
+    raw = Path(pdb_file).read_bytes().split(b'\n')
+    width = max(PDB_LINE_WIDTH, max(map(len, raw)))
+    return np.array(raw, dtype=f'S{width}')
+
+
+def _pdb_column(lines: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Slice columns [start:stop] out of every line as a byte-string array."""
+    chars = lines.view('S1').reshape(-1, lines.itemsize)[:, start:stop]
+    return np.ascontiguousarray(chars).view(f'S{stop - start}').ravel()
+
+
+def _to_float(values: np.ndarray) -> np.ndarray:
+    """Convert a byte-string column to float64, mapping malformed entries to NaN."""
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                continue
+        return out
+
+
+def _parse_pdb(pdb_file: Path) -> ParsedPDB:
+    """Parse the columns used by this step in a single pass."""
+    lines = _read_pdb_lines(pdb_file)
+    record = _pdb_column(lines, 0, 6)
+    res_names = np.char.strip(_pdb_column(lines, 17, 20))
+    chain_ids = _pdb_column(lines, 21, 22)
+    
+    atom_rows = np.char.startswith(record, b'ATOM') | np.char.startswith(record, b'HETATM')
+    xyz = np.full((len(lines), 3), np.nan)
+    for axis, (start, stop) in enumerate(((30, 38), (38, 46), (46, 54))):
+        xyz[atom_rows, axis] = _to_float(_pdb_column(lines[atom_rows], start, stop))
+    
+    return ParsedPDB(lines, record, res_names, chain_ids, xyz)
+
+
+def _parse_cache_file(pdb_file: Path) -> Path:
+    """On-disk parse cache stored next to the PDB file."""
+    return pdb_file.with_name(pdb_file.name + '.npz')
+
+
+@functools.lru_cache(maxsize=8)
+def _load_pdb_cached(path_str: str, mtime_ns: int, size: int) -> ParsedPDB:
+    """Load a parsed PDB from the .npz cache if it matches mtime/size, else parse it."""
+    pdb_file = Path(path_str)
+    cache_file = _parse_cache_file(pdb_file)
+    names = [f.name for f in fields(ParsedPDB)]
+    
+    parsed = None
+    if cache_file.exists():
+        try:
+            with np.load(cache_file, allow_pickle=False) as npz:
+                if int(npz['mtime_ns']) == mtime_ns and int(npz['size']) == size:
+                    parsed = ParsedPDB(**{name: npz[name] for name in names})
+        except (OSError, ValueError, KeyError):
+            parsed = None
+    
+    if parsed is None:
+        parsed = _parse_pdb(pdb_file)
+        try:
+            np.savez(
+                cache_file,
+                mtime_ns=mtime_ns,
+                size=size,
+                **{name: getattr(parsed, name) for name in names}
+            )
+        except OSError:
+            pass  # Read-only input directory; the in-process cache still applies
+    
+    for name in names:
+        getattr(parsed, name).setflags(write=False)
+    return parsed
+
+
+def load_pdb(pdb_file: Union[Path, str, ParsedPDB]) -> ParsedPDB:
+    """
+    Parse a PDB file once per process (and once per file version on disk).
+    
+    Args:
+        pdb_file: Path to PDB file, or an already parsed PDB
+        
+    Returns:
+        ParsedPDB shared by parse_pdb_components, extract_binding_site and clean_pdb
+    """
+    if isinstance(pdb_file, ParsedPDB):
+        return pdb_file
+    
+    path = Path(pdb_file).resolve()
+    stat = path.stat()
+    return _load_pdb_cached(str(path), stat.st_mtime_ns, stat.st_size)
+
 
-def parse_pdb_components(pdb_file: Path) -> Dict:
+def _unique_in_order(values: np.ndarray) -> List[str]:
+    """Unique byte strings in order of first appearance, decoded."""
+    _, first = np.unique(values, return_index=True)
+    return [v.decode() for v in values[np.sort(first)]]
+
+
+def parse_pdb_components(pdb_file: Union[Path, ParsedPDB]) -> Dict:
     """
     Parse PDB file and identify components.
     
     Returns:
         Dictionary with chains, ligands (excluding common solvents), waters, metals info
     """
-    chains = set()
-    all_ligands = []
-    drug_ligands = []
-    waters = 0
-    metals = []
-    protein_atoms = 0
-    
-    with open(pdb_file, 'r') as f:
-        for line in f:
-            if line.startswith('ATOM'):
-                chains.add(line[21])
-                protein_atoms += 1
-            elif line.startswith('HETATM'):
-                res_name = line[17:20].strip()
-                chain = line[21]
-                if res_name == 'HOH':
-                    waters += 1
-                elif res_name in ['ZN', 'MG', 'CA', 'FE', 'MN', 'CU', 'NA', 'K', 'CL']:
-                    metals.append(res_name)
-                else:
-                    all_ligands.append(res_name)
-                    # Only add to drug_ligands if not a common solvent
-                    if res_name not in COMMON_SOLVENTS:
-                        drug_ligands.append(res_name)
-    
-    # Deduplicate while preserving order
-    seen = set()
-    unique_drug_ligands = []
-    for lig in drug_ligands:
-        if lig not in seen:
-            seen.add(lig)
-            unique_drug_ligands.append(lig)
+    pdb = load_pdb(pdb_file)
+    record, res_names, chain_ids = pdb.record, pdb.res_names, pdb.chain_ids
+    
+    atom_mask = np.char.startswith(record, b'ATOM')
+    het_mask = np.char.startswith(record, b'HETATM')
+    
+    water_mask = het_mask & (res_names == b'HOH')
+    metal_mask = het_mask & np.isin(res_names, [m.encode() for m in METAL_RESIDUES])
+    ligand_mask = het_mask & ~water_mask & ~metal_mask
+    # Only count as drug-like ligands if not a common solvent
+    drug_mask = ligand_mask & ~np.isin(res_names, [r.encode() for r in COMMON_SOLVENTS])
     
     return {
-        'chains': sorted(chains),
-        'ligands': unique_drug_ligands,  # Drug-like ligands only
-        'all_ligands': list(set(all_ligands)),  # All ligands for reference
-        'waters': waters,
-        'metals': list(set(metals)),
-        'protein_atoms': protein_atoms
+        'chains': sorted(c.decode() for c in np.unique(chain_ids[atom_mask])),
+        'ligands': _unique_in_order(res_names[drug_mask]),  # Drug-like ligands only
+        'all_ligands': [r.decode() for r in np.unique(res_names[ligand_mask])],  # All ligands for reference
+        'waters': int(water_mask.sum()),
+        'metals': [r.decode() for r in np.unique(res_names[metal_mask])],
+        'protein_atoms': int(atom_mask.sum())
     }
 
 
-def extract_binding_site(pdb_file: Path, ligand_name: str, padding: float = 10.0, chain: str = None) -> Optional[Dict]:
+def extract_binding_site(pdb_file: Union[Path, ParsedPDB], ligand_name: str, padding: float = 10.0, chain: str = None) -> Optional[Dict]:
     """
     Extract binding site coordinates and auto-calculate grid box size.
     
@@ -96,36 +208,22 @@ def extract_binding_site(pdb_file: Path, ligand_name: str, padding: float = 10.0
     Returns:
         Dictionary with center coordinates and box dimensions, or None
     """
-    coords = []
-    
-    with open(pdb_file, 'r') as f:
-        for line in f:
-            if line.startswith('HETATM'):
-                res_name = line[17:20].strip()
-                line_chain = line[21]
-                # Filter by ligand name and optionally by chain
-                if res_name == ligand_name:
-                    if chain is None or line_chain == chain:
-                        try:
-                            x = float(line[30:38])
-                            y = float(line[38:46])
-                            z = float(line[46:54])
-                            coords.append((x, y, z))
-                        except ValueError:
-                            continue
-    
-    if not coords:
+    pdb = load_pdb(pdb_file)
+    
+    # Filter by ligand name and optionally by chain
+    mask = np.char.startswith(pdb.record, b'HETATM') & (pdb.res_names == ligand_name.encode())
+    if chain is not None:
+        mask &= pdb.chain_ids == chain.encode()
+    
+    coords = pdb.xyz[mask]
+    coords = coords[~np.isnan(coords).any(axis=1)]
+    
+    if len(coords) == 0:
         return None
-
     
     # Calculate bounding box of ligand
-    xs = [c[0] for c in coords]
-    ys = [c[1] for c in coords]
-    zs = [c[2] for c in coords]
-    
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-    min_z, max_z = min(zs), max(zs)
+    min_x, min_y, min_z = (float(v) for v in coords.min(axis=0))
+    max_x, max_y, max_z = (float(v) for v in coords.max(axis=0))
     
     # Center = midpoint of bounding box
     center_x = (min_x + max_x) / 2
@@ -156,7 +254,7 @@ def extract_binding_site(pdb_file: Path, ligand_name: str, padding: float = 10.0
 
 
 def clean_pdb(
-    input_file: Path,
+    input_file: Union[Path, ParsedPDB],
     output_file: Path,
     keep_chain: str = 'A',
     remove_hetatm: bool = True,
@@ -166,7 +264,7 @@ def clean_pdb(
     Clean PDB file by removing unwanted components.
     
     Args:
-        input_file: Input PDB path
+        input_file: Input PDB path or parsed PDB
         output_file: Output PDB path
         keep_chain: Chain ID to keep (default: 'A')
         remove_hetatm: Remove all HETATM records
@@ -177,28 +275,25 @@ def clean_pdb(
     """
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
-    metal_residues = {'ZN', 'MG', 'CA', 'FE', 'MN', 'CU', 'NA', 'K', 'CL'}
+    pdb = load_pdb(input_file)
     
-    with open(input_file, 'r') as f_in, open(output_file, 'w') as f_out:
-        for line in f_in:
-            # Keep ATOM records for specified chain
-            if line.startswith('ATOM'):
-                chain = line[21]
-                if chain == keep_chain or keep_chain == 'ALL':
-                    f_out.write(line)
-            
-            # Handle HETATM
-            elif line.startswith('HETATM'):
-                if not remove_hetatm:
-                    f_out.write(line)
-                elif keep_metals:
-                    res_name = line[17:20].strip()
-                    if res_name in metal_residues:
-                        f_out.write(line)
-            
-            # Keep TER and END
-            elif line.startswith(('TER', 'END')):
-                f_out.write(line)
+    # Keep ATOM records for specified chain
+    keep = np.char.startswith(pdb.record, b'ATOM')
+    if keep_chain != 'ALL':
+        keep &= pdb.chain_ids == keep_chain.encode()
+    
+    # Handle HETATM
+    het_mask = np.char.startswith(pdb.record, b'HETATM')
+    if not remove_hetatm:
+        keep |= het_mask
+    elif keep_metals:
+        keep |= het_mask & np.isin(pdb.res_names, [m.encode() for m in METAL_RESIDUES])
+    
+    # Keep TER and END
+    keep |= np.char.startswith(pdb.record, b'TER') | np.char.startswith(pdb.record, b'END')
+    
+    kept = pdb.lines[keep]
+    output_file.write_bytes(b'\n'.join(kept) + b'\n' if len(kept) else b'')
     
     return output_file
 
@@ -244,6 +339,59 @@ def pdb_to_pdbqt(pdb_file: Path, pdbqt_file: Path) -> Optional[Path]:
     return pdbqt_file
 
 
+def pdbs_to_pdbqt_batch(pairs: List[Tuple[Path, Path]]) -> List[Path]:
+    """
+    Convert several PDB files to PDBQT with a single Open Babel run.
+    
+    Uses the pybel bindings in-process when available, otherwise one
+    ``obabel -m`` call over all inputs. Files that did not convert fall back
+    to pdb_to_pdbqt one by one.
+    
+    Args:
+        pairs: (pdb_file, pdbqt_file) tuples
+        
+    Returns:
+        PDBQT paths, in the same order as pairs
+    """
+    import subprocess
+    
+    if not pairs:
+        return []
+    
+    # Clear outputs from earlier runs so a failed conversion is not masked
+    for _, pdbqt_file in pairs:
+        pdbqt_file.parent.mkdir(parents=True, exist_ok=True)
+        pdbqt_file.unlink(missing_ok=True)
+    
+    if HAS_PYBEL:
+        for pdb_file, pdbqt_file in pairs:
+            try:
+                mol = next(pybel.readfile('pdb', str(pdb_file)))
+                mol.write('pdbqt', str(pdbqt_file), overwrite=True, opt={'r': None})
+            except (OSError, StopIteration):
+                continue
+    else:
+        # With -m and no -O, obabel writes <input stem>.pdbqt next to each input
+        try:
+            subprocess.run(
+                ['obabel', *(str(pdb_file) for pdb_file, _ in pairs), '-opdbqt', '-m', '-xr'],
+                capture_output=True,
+                text=True
+            )
+        except FileNotFoundError:
+            pass
+        else:
+            for pdb_file, pdbqt_file in pairs:
+                converted = pdb_file.with_suffix('.pdbqt')
+                if converted.exists() and converted != pdbqt_file:
+                    converted.replace(pdbqt_file)
+    
+    return [
+        pdbqt_file if pdbqt_file.exists() else pdb_to_pdbqt(pdb_file, pdbqt_file)
+        for pdb_file, pdbqt_file in pairs
+    ]
+
+
 @click.command()
 @click.option('--input-dir', '-i', required=True, help='Directory with raw PDB files')
 @click.option('--output-dir', '-o', default=None, help='Output directory for prepared files')
@@ -271,8 +419,11 @@ def main(input_dir: str, output_dir: str, chain: str, keep_metals: bool):
         pdb_id = pdb_file.stem
         print(f"[{pdb_id}]")
         
+        # Parse once; the components, binding site and cleaning steps share it
+        pdb = load_pdb(pdb_file)
+        
         # Analyze components
-        components = parse_pdb_components(pdb_file)
+        components = parse_pdb_components(pdb)
         print(f"  Chains: {components['chains']}")
         print(f"  Ligands: {components['ligands']}")
         print(f"  Waters: {components['waters']}")
@@ -281,7 +432,7 @@ def main(input_dir: str, output_dir: str, chain: str, keep_metals: bool):
         # Extract binding site from first ligand (auto-calculate size, filter by chain)
         if components['ligands']:
             first_ligand = components['ligands'][0]
-            site = extract_binding_site(pdb_file, first_ligand, chain=chain if chain != 'ALL' else None)
+            site = extract_binding_site(pdb, first_ligand, chain=chain if chain != 'ALL' else None)
             if site:
                 binding_sites[pdb_id] = site
                 print(f"  📍 Binding site from {first_ligand} (Chain {chain}):")
@@ -292,16 +443,19 @@ def main(input_dir: str, output_dir: str, chain: str, keep_metals: bool):
         
         # Clean PDB
         clean_file = output_path / f"{pdb_id}_clean.pdb"
-        clean_pdb(pdb_file, clean_file, keep_chain=chain, keep_metals=keep_metals)
+        clean_pdb(pdb, clean_file, keep_chain=chain, keep_metals=keep_metals)
         print(f"  ✅ Cleaned: {clean_file.name}")
         
-        # Convert to PDBQT
         pdbqt_file = output_path / f"{pdb_id}.pdbqt"
-        pdb_to_pdbqt(clean_file, pdbqt_file)
-        print(f"  ✅ PDBQT: {pdbqt_file.name}")
-        
         results.append((pdb_id, clean_file, pdbqt_file))
     
+    # Convert all cleaned receptors to PDBQT in one Open Babel run
+    if results:
+        print("\nConverting to PDBQT...")
+    pdbs_to_pdbqt_batch([(clean_file, pdbqt_file) for _, clean_file, pdbqt_file in results])
+    for pdb_id, clean_file, pdbqt_file in results:
+        print(f"  ✅ PDBQT: {pdbqt_file.name}")
+    
     # Save binding sites
     if binding_sites:
         import json
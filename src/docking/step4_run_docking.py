@@ -12,12 +12,28 @@ Usage:
 """
 
 import os
+import re
+import csv
+import hashlib
+import shlex
+import shutil
 import subprocess
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import click
-from dataclasses import dataclass
+import numpy as np
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Row of the Vina energy table: mode, affinity, rmsd l.b., rmsd u.b.
+_VINA_ROW = re.compile(r'^\s*(\d+)\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)\s+(-?\d+(?:\.\d+)?)', re.M)
 
 
 @dataclass
@@ -30,41 +46,162 @@ class DockingJob:
     output_file: Path
     log_file: Path
     binding_site: Dict[str, float]
+    site_args: List[str] = field(default_factory=list)
 
 
-def check_vina():
+def check_vina(vina: str = 'vina') -> bool:
     """Check if AutoDock Vina is available."""
     try:
-        result = subprocess.run(['vina', '--version'], capture_output=True, text=True)
+        result = subprocess.run([vina, '--version'], capture_output=True, text=True)
         return result.returncode == 0
     except FileNotFoundError:
         return False
 
 
-def run_vina(job: DockingJob, exhaustiveness: int = 8, num_modes: int = 9) -> Optional[Dict]:
+def vina_site_args(site: Dict[str, float]) -> List[str]:
+    """Build the search box arguments for a receptor's binding site."""
+    return [
+        '--center_x', f"{site.get('center_x', 0)}",
+        '--center_y', f"{site.get('center_y', 0)}",
+        '--center_z', f"{site.get('center_z', 0)}",
+        '--size_x', f"{site.get('size_x', 25)}",
+        '--size_y', f"{site.get('size_y', 25)}",
+        '--size_z', f"{site.get('size_z', 25)}",
+    ]
+
+
+def vina_command(
+    job: DockingJob,
+    exhaustiveness: int = 8,
+    num_modes: int = 9,
+    cpu: Optional[int] = None,
+    vina: str = 'vina'
+) -> List[str]:
+    """Build the Vina argv for a single job."""
+    cmd = [
+        vina,
+        '--receptor', f"{job.receptor_file}",
+        '--ligand', f"{job.ligand_file}",
+        '--out', f"{job.output_file}",
+        *(job.site_args or vina_site_args(job.binding_site)),
+        '--exhaustiveness', f"{exhaustiveness}",
+        '--num_modes', f"{num_modes}",
+    ]
+    if cpu:
+        cmd += ['--cpu', f"{cpu}"]
+    return cmd
+
+
+def write_vina_commands(
+    jobs: List[DockingJob],
+    commands_file: Path,
+    exhaustiveness: int = 8,
+    cpu: Optional[int] = None,
+    vina: str = 'vina'
+) -> Path:
+    """
+    Write one shell command per docking job instead of running them.
+    
+    Each line runs Vina, saves its stdout as the job log and, if Vina
+    succeeded, writes the job's .done sidecar. The file can be fed to an
+    external scheduler (``parallel -j N < FILE``, a Slurm array); a later
+    run of this step then picks the finished jobs up via load_completed
+    instead of docking them again.
+    
+    Args:
+        jobs: Docking jobs
+        commands_file: Output file
+        exhaustiveness: Vina exhaustiveness
+        cpu: CPUs per Vina process
+        vina: Vina executable to call
+        
+    Returns:
+        Path to the commands file
+    """
+    commands_file.parent.mkdir(parents=True, exist_ok=True)
+    for out_dir in {job.output_file.parent for job in jobs}:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    
+    with open(commands_file, 'w') as f:
+        f.write(f"# Step 4: {len(jobs)} Vina jobs; run with: parallel -j N < {commands_file.name}\n")
+        for job in jobs:
+            cmd = vina_command(job, exhaustiveness=exhaustiveness, cpu=cpu, vina=vina)
+            done = json.dumps({'key': job_key(job, exhaustiveness)})
+            f.write(
+                f"{shlex.join(cmd)} > {shlex.quote(str(job.log_file))}"
+                f" && printf '%s' {shlex.quote(done)} > {shlex.quote(str(_done_file(job)))}\n"
+            )
+    
+    return commands_file
+
+
+def _done_file(job: DockingJob) -> Path:
+    """Sidecar marking a job as completed with specific inputs."""
+    return job.log_file.with_suffix('.done')
+
+
+def job_key(job: DockingJob, exhaustiveness: int = 8, num_modes: int = 9) -> str:
+    """Hash of everything that changes a job's result: input files and Vina settings."""
+    receptor_stat = job.receptor_file.stat()
+    ligand_stat = job.ligand_file.stat()
+    payload = json.dumps({
+        'receptor': [str(job.receptor_file), receptor_stat.st_mtime_ns, receptor_stat.st_size],
+        'ligand': [str(job.ligand_file), ligand_stat.st_mtime_ns, ligand_stat.st_size],
+        'site': job.site_args or vina_site_args(job.binding_site),
+        'exhaustiveness': exhaustiveness,
+        'num_modes': num_modes,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_completed(job: DockingJob, exhaustiveness: int = 8, num_modes: int = 9) -> Optional[Dict]:
+    """
+    Return the parsed result of a previous run of this job, if still valid.
+    
+    A job counts as done when its pose and log exist and the .done sidecar
+    matches the current inputs and settings.
+    
+    Returns:
+        Parsed Vina table, or None if the job needs to run
+    """
+    done_file = _done_file(job)
+    if not (done_file.exists() and job.log_file.exists() and job.output_file.exists()):
+        return None
+    
+    try:
+        done = json.loads(done_file.read_text())
+        if done.get('key') != job_key(job, exhaustiveness, num_modes):
+            return None
+    except (OSError, ValueError):
+        return None
+    
+    parsed = parse_vina_log(job.log_file)
+    return parsed if parsed.get('modes') else None
+
+
+def run_vina(
+    job: DockingJob,
+    exhaustiveness: int = 8,
+    num_modes: int = 9,
+    cpu: Optional[int] = None,
+    vina: str = 'vina'
+) -> Optional[Dict]:
     """
     Run AutoDock Vina for a single job.
     
+    Args:
+        job: Docking job
+        exhaustiveness: Vina exhaustiveness
+        num_modes: Number of binding modes to report
+        cpu: CPUs for this Vina process (None lets Vina use all cores)
+        vina: Path to the Vina executable
+    
     Returns:
         Dictionary with results or None if failed
     """
     job.output_file.parent.mkdir(parents=True, exist_ok=True)
     
-    cmd = [
-        'vina',
-        '--receptor', str(job.receptor_file),
-        '--ligand', str(job.ligand_file),
-        '--out', str(job.output_file),
-        '--log', str(job.log_file),
-        '--center_x', str(job.binding_site.get('center_x', 0)),
-        '--center_y', str(job.binding_site.get('center_y', 0)),
-        '--center_z', str(job.binding_site.get('center_z', 0)),
-        '--size_x', str(job.binding_site.get('size_x', 25)),
-        '--size_y', str(job.binding_site.get('size_y', 25)),
-        '--size_z', str(job.binding_site.get('size_z', 25)),
-        '--exhaustiveness', str(exhaustiveness),
-        '--num_modes', str(num_modes),
-    ]
+    cmd = vina_command(job, exhaustiveness, num_modes, cpu, vina)
     
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
@@ -72,8 +209,13 @@ def run_vina(job: DockingJob, exhaustiveness: int = 8, num_modes: int = 9) -> Op
         if result.returncode != 0:
             return {'error': result.stderr}
         
-        # Parse log for results
-        return parse_vina_log(job.log_file)
+        # Vina prints the same table to stdout; keep a copy as the job log
+        job.log_file.write_text(result.stdout)
+        parsed = _parse_vina_table(result.stdout)
+        
+        if parsed['modes']:
+            _done_file(job).write_text(json.dumps({'key': job_key(job, exhaustiveness, num_modes)}))
+        return parsed
         
     except subprocess.TimeoutExpired:
         return {'error': 'Timeout (10 min)'}
@@ -81,45 +223,34 @@ def run_vina(job: DockingJob, exhaustiveness: int = 8, num_modes: int = 9) -> Op
         return {'error': 'Vina not found'}
 
 
+def _parse_vina_table(text: str) -> Dict:
+    """Parse the Vina energy table from log or stdout text."""
+    start = text.find('-----+------------')
+    if start == -1:
+        return {'modes': [], 'best_affinity': None}
+    
+    modes = [
+        {
+            'mode': int(mode),
+            'affinity': float(affinity),
+            'rmsd_lb': float(rmsd_lb),
+            'rmsd_ub': float(rmsd_ub)
+        }
+        for mode, affinity, rmsd_lb, rmsd_ub in _VINA_ROW.findall(text, start)
+    ]
+    
+    return {
+        'modes': modes,
+        'best_affinity': min((m['affinity'] for m in modes), default=None)
+    }
+
+
 def parse_vina_log(log_file: Path) -> Dict:
     """Parse Vina log file for binding affinities."""
-    results = {
-        'modes': [],
-        'best_affinity': None
-    }
-    
     if not log_file.exists():
         return {'error': 'Log file not found'}
     
-    with open(log_file, 'r') as f:
-        in_results = False
-        for line in f:
-            if '-----+------------' in line:
-                in_results = True
-                continue
-            
-            if in_results and line.strip():
-                parts = line.split()
-                if len(parts) >= 4 and parts[0].isdigit():
-                    try:
-                        mode = int(parts[0])
-                        affinity = float(parts[1])
-                        rmsd_lb = float(parts[2])
-                        rmsd_ub = float(parts[3])
-                        
-                        results['modes'].append({
-                            'mode': mode,
-                            'affinity': affinity,
-                            'rmsd_lb': rmsd_lb,
-                            'rmsd_ub': rmsd_ub
-                        })
-                        
-                        if results['best_affinity'] is None or affinity < results['best_affinity']:
-                            results['best_affinity'] = affinity
-                    except (ValueError, IndexError):
-                        continue
-    
-    return results
+    return _parse_vina_table(log_file.read_text())
 
 
 @click.command()
@@ -128,20 +259,30 @@ def parse_vina_log(log_file: Path) -> Dict:
 @click.option('--output-dir', '-o', default=None, help='Output directory')
 @click.option('--binding-sites', '-b', default=None, help='JSON file with binding site coordinates')
 @click.option('--exhaustiveness', '-e', default=8, help='Vina exhaustiveness')
+@click.option('--cpu', default=1, help='CPUs per Vina process')
+@click.option('--jobs', '-j', 'n_workers', default=None, type=int, help='Parallel Vina processes (default: cores / cpu)')
+@click.option('--emit-commands', default=None, help='Write Vina commands to this file instead of running them')
+@click.option('--force', is_flag=True, help='Rerun jobs that already completed')
 @click.option('--dry-run', is_flag=True, help='Show jobs without running')
 def main(receptors: str, ligands: str, output_dir: str, binding_sites: str, 
-         exhaustiveness: int, dry_run: bool):
+         exhaustiveness: int, cpu: int, n_workers: Optional[int], emit_commands: Optional[str],
+         force: bool, dry_run: bool):
     """Step 4: Run molecular docking with AutoDock Vina."""
     print("=" * 50)
     print("STEP 4: Run Molecular Docking")
     print("=" * 50)
     
-    # Check Vina
-    if not check_vina():
+    # Check Vina, resolving it on PATH once for all jobs
+    vina = shutil.which('vina')
+    if emit_commands:
+        # Commands may run on another machine; fall back to a PATH lookup there
+        vina = vina or 'vina'
+    elif vina is None or not check_vina(vina):
         print("\n❌ ERROR: AutoDock Vina not found in PATH!")
         print("Download from: https://vina.scripps.edu/")
         return
-    print("✅ AutoDock Vina found")
+    else:
+        print("✅ AutoDock Vina found")
     
     receptor_dir = Path(receptors)
     ligand_dir = Path(ligands)
@@ -181,6 +322,7 @@ def main(receptors: str, ligands: str, output_dir: str, binding_sites: str,
             'center_x': 0, 'center_y': 0, 'center_z': 0,
             'size_x': 25, 'size_y': 25, 'size_z': 25
         })
+        site_args = vina_site_args(site)
         
         for ligand_file in ligand_files:
             ligand_name = ligand_file.stem
@@ -192,7 +334,8 @@ def main(receptors: str, ligands: str, output_dir: str, binding_sites: str,
                 ligand_file=ligand_file,
                 output_file=output_dir / f"{ligand_name}_{receptor_name}.pdbqt",
                 log_file=output_dir / f"{ligand_name}_{receptor_name}.log",
-                binding_site=site
+                binding_site=site,
+                site_args=site_args
             )
             jobs.append(job)
     
@@ -204,41 +347,86 @@ def main(receptors: str, ligands: str, output_dir: str, binding_sites: str,
             print(f"  ... and {len(jobs) - 10} more")
         return
     
+    if emit_commands:
+        commands_file = write_vina_commands(
+            jobs, Path(emit_commands), exhaustiveness=exhaustiveness, cpu=cpu, vina=vina
+        )
+        print(f"\n📝 Wrote {len(jobs)} Vina commands to: {commands_file}")
+        return
+    
     # Run docking
     results = []
     failed = []
     
-    print(f"\n🚀 Running {len(jobs)} docking jobs...\n")
+    if n_workers is None:
+        n_workers = max(1, (os.cpu_count() or 1) // max(cpu, 1))
     
-    for i, job in enumerate(jobs, 1):
-        print(f"[{i}/{len(jobs)}] {job.ligand_name} → {job.receptor_name}", end=" ")
-        
-        result = run_vina(job, exhaustiveness=exhaustiveness)
-        
+    # Vina runs are independent; keep results in job order regardless of completion order
+    outcomes: Dict[int, Dict] = {}
+    
+    # Reuse results from earlier runs whose inputs have not changed
+    if not force:
+        for idx, job in enumerate(jobs):
+            previous = load_completed(job, exhaustiveness=exhaustiveness)
+            if previous is not None:
+                outcomes[idx] = previous
+        if outcomes:
+            print(f"\n⏭️  Skipping {len(outcomes)} completed jobs (use --force to rerun)")
+    
+    pending = [idx for idx in range(len(jobs)) if idx not in outcomes]
+    print(f"\n🚀 Running {len(pending)} docking jobs ({n_workers} parallel, {cpu} CPU each)...\n")
+    
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {
+            executor.submit(run_vina, jobs[idx], exhaustiveness=exhaustiveness, cpu=cpu, vina=vina): idx
+            for idx in pending
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            idx = futures[future]
+            job = jobs[idx]
+            result = future.result()
+            outcomes[idx] = result
+            
+            print(f"[{done}/{len(pending)}] {job.ligand_name} → {job.receptor_name}", end=" ")
+            if 'error' in result:
+                print(f"❌ {result['error']}")
+            else:
+                print(f"✅ {result.get('best_affinity', 'N/A')} kcal/mol")
+    
+    for idx, job in enumerate(jobs):
+        result = outcomes[idx]
         if 'error' in result:
-            print(f"❌ {result['error']}")
             failed.append((job, result['error']))
         else:
-            best = result.get('best_affinity', 'N/A')
-            print(f"✅ {best} kcal/mol")
             results.append({
                 'receptor': job.receptor_name,
                 'ligand': job.ligand_name,
-                'best_affinity': best,
+                'best_affinity': result.get('best_affinity', 'N/A'),
                 'modes': result.get('modes', [])
             })
     
     # Save results
     results_file = output_dir / "docking_results.json"
-    with open(results_file, 'w') as f:
-        json.dump(results, f, indent=2)
+    if HAS_ORJSON:
+        results_file.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open(results_file, 'w') as f:
+            json.dump(results, f, indent=2)
     
     # Save CSV summary
     csv_file = output_dir / "docking_summary.csv"
-    with open(csv_file, 'w') as f:
-        f.write("ligand,receptor,best_affinity_kcal_mol\n")
-        for r in sorted(results, key=lambda x: x['best_affinity'] or 0):
-            f.write(f"{r['ligand']},{r['receptor']},{r['best_affinity']}\n")
+    affinities = np.array(
+        [r['best_affinity'] if r['best_affinity'] is not None else np.nan for r in results],
+        dtype=np.float64
+    )
+    order = np.argsort(np.nan_to_num(affinities, nan=0.0), kind='stable')
+    with open(csv_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['ligand', 'receptor', 'best_affinity_kcal_mol'])
+        writer.writerows(
+            (results[i]['ligand'], results[i]['receptor'], results[i]['best_affinity'])
+            for i in order
+        )
     
     print("\n" + "=" * 50)
     print("SUMMARY")
@@ -11,62 +11,93 @@ Usage:
     python -m src.docking.step5_analyze --results docking_results.json
 """
 
+import csv
 import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import click
+import numpy as np
 
 try:
-    import pandas as pd
-    HAS_PANDAS = True
+    import orjson
+    HAS_ORJSON = True
 except ImportError:
-    HAS_PANDAS = False
+    HAS_ORJSON = False
 
 
 def load_results(results_file: Path) -> List[Dict]:
     """Load docking results from JSON."""
+    if HAS_ORJSON:
+        return orjson.loads(Path(results_file).read_bytes())
     with open(results_file) as f:
         return json.load(f)
 
 
-def create_affinity_matrix(results: List[Dict]) -> Dict:
-    """Create ligand × receptor affinity matrix."""
-    matrix = {}
+def create_affinity_matrix(results: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Create ligand × receptor affinity matrix.
     
-    for r in results:
-        ligand = r['ligand']
-        receptor = r['receptor']
-        affinity = r.get('best_affinity')
-        
-        if ligand not in matrix:
-            matrix[ligand] = {}
-        matrix[ligand][receptor] = affinity
+    Returns:
+        Tuple of (ligands, receptors, matrix) where matrix[i, j] is the best
+        affinity of ligands[i] against receptors[j], NaN if not docked.
+    """
+    ligs = np.array([r['ligand'] for r in results], dtype=str)
+    recs = np.array([r['receptor'] for r in results], dtype=str)
+    aff = np.array(
+        [r.get('best_affinity') if r.get('best_affinity') is not None else np.nan for r in results],
+        dtype=np.float64
+    )
+    
+    ligands, li = np.unique(ligs, return_inverse=True)
+    receptors, ri = np.unique(recs, return_inverse=True)
+    
+    matrix = np.full((len(ligands), len(receptors)), np.nan)
+    matrix[li, ri] = aff
     
-    return matrix
+    return ligands, receptors, matrix
+
+
+def save_affinity_matrix(ligands: np.ndarray, receptors: np.ndarray,
+                         matrix: np.ndarray, output_file: Path):
+    """Write the affinity matrix as CSV, leaving missing pairs empty."""
+    cells = np.where(np.isnan(matrix), '', matrix.astype(str))
+    table = np.column_stack((ligands, cells)) if len(ligands) else np.empty((0, 1), dtype=str)
+    np.savetxt(
+        output_file, table, fmt='%s', delimiter=',',
+        header=",".join(['ligand', *receptors]), comments=''
+    )
 
 
 def rank_by_affinity(results: List[Dict]) -> List[Dict]:
     """Rank all results by binding affinity."""
     valid = [r for r in results if r.get('best_affinity') is not None]
-    return sorted(valid, key=lambda x: x['best_affinity'])
+    aff = np.fromiter((r['best_affinity'] for r in valid), dtype=np.float64, count=len(valid))
+    order = np.argsort(aff, kind='stable')
+    return [valid[i] for i in order]
 
 
 def rank_by_target(results: List[Dict]) -> Dict[str, List]:
     """Rank ligands for each target."""
-    by_target = {}
+    if not results:
+        return {}
     
-    for r in results:
-        receptor = r['receptor']
-        if receptor not in by_target:
-            by_target[receptor] = []
-        by_target[receptor].append(r)
-    
-    # Sort each target's results
-    for receptor in by_target:
-        by_target[receptor] = sorted(
-            by_target[receptor],
-            key=lambda x: x.get('best_affinity') or 0
-        )
+    recs = np.array([r['receptor'] for r in results], dtype=str)
+    aff = np.fromiter(
+        (r.get('best_affinity') or 0 for r in results),
+        dtype=np.float64, count=len(results)
+    )
+    
+    # Sort by receptor, then affinity; each receptor becomes a contiguous run
+    order = np.lexsort((aff, recs))
+    receptors, starts = np.unique(recs[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    
+    # Keep targets in the order they first appear in the results
+    _, first_seen = np.unique(recs, return_index=True)
+    
+    by_target = {}
+    for g in np.argsort(first_seen):
+        group = order[bounds[g]:bounds[g + 1]]
+        by_target[str(receptors[g])] = [results[i] for i in group]
     
     return by_target
 
@@ -83,6 +114,11 @@ def compare_with_controls(results: List[Dict], control_names: List[str]) -> Dict
         else:
             test_compounds[ligand] = r
     
+    # Index controls by target; the first control listed for a receptor wins
+    control_by_receptor = {}
+    for ctrl_name, ctrl_result in controls.items():
+        control_by_receptor.setdefault(ctrl_result['receptor'], (ctrl_name, ctrl_result))
+    
     # Find compounds that beat controls
     better_than_control = []
     for ligand, result in test_compounds.items():
@@ -90,10 +126,10 @@ def compare_with_controls(results: List[Dict], control_names: List[str]) -> Dict
         control_affinity = None
         
         # Find control for this target
-        for ctrl_name, ctrl_result in controls.items():
-            if ctrl_result['receptor'] == result['receptor']:
-                control_affinity = ctrl_result.get('best_affinity')
-                break
+        ctrl = control_by_receptor.get(result['receptor'])
+        if ctrl is not None:
+            ctrl_name, ctrl_result = ctrl
+            control_affinity = ctrl_result.get('best_affinity')
         
         if affinity and control_affinity and affinity < control_affinity:
             better_than_control.append({
@@ -173,30 +209,26 @@ def main(results: str, output_dir: str, controls: tuple):
         'best_per_target': {k: v[0] if v else None for k, v in by_target.items()},
         'comparison': comparison
     }
-    with open(analysis_file, 'w') as f:
-        json.dump(analysis_data, f, indent=2, default=str)
+    if HAS_ORJSON:
+        analysis_file.write_bytes(orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2, default=str))
+    else:
+        with open(analysis_file, 'w') as f:
+            json.dump(analysis_data, f, indent=2, default=str)
     
     # CSV ranking
     ranking_file = output_dir / "ranking_overall.csv"
-    with open(ranking_file, 'w') as f:
-        f.write("rank,ligand,receptor,affinity_kcal_mol\n")
-        for i, r in enumerate(ranked, 1):
-            f.write(f"{i},{r['ligand']},{r['receptor']},{r['best_affinity']}\n")
+    with open(ranking_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['rank', 'ligand', 'receptor', 'affinity_kcal_mol'])
+        writer.writerows(
+            (i, r['ligand'], r['receptor'], r['best_affinity'])
+            for i, r in enumerate(ranked, 1)
+        )
     
     # Affinity matrix
-    matrix = create_affinity_matrix(data)
+    ligands, receptors, matrix = create_affinity_matrix(data)
     matrix_file = output_dir / "affinity_matrix.csv"
-    if HAS_PANDAS:
-        df = pd.DataFrame(matrix).T
-        df.to_csv(matrix_file)
-    else:
-        # Simple CSV
-        receptors = list(set(r['receptor'] for r in data))
-        with open(matrix_file, 'w') as f:
-            f.write("ligand," + ",".join(receptors) + "\n")
-            for ligand, values in matrix.items():
-                row = [str(values.get(r, '')) for r in receptors]
-                f.write(f"{ligand}," + ",".join(row) + "\n")
+    save_affinity_matrix(ligands, receptors, matrix, matrix_file)
     
     print("\n" + "=" * 50)
     print("OUTPUTS")
@@ -8,17 +8,53 @@ Performs pathway enrichment analysis using:
 - Reactome (optional)
 """
 
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+import hashlib
+import importlib.util
 import json
+import pickle
+import time
 
-try:
-    import gseapy as gp
-except ImportError:
-    gp = None
+# scipy.stats is slow to import and only needed by the local backend
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
 
 from ..config_loader import Config
+from ..io_utils import write_table
+
+
+# Enrichr libraries queried by run_all_enrichments, keyed by result name
+ENRICHR_LIBRARIES = {
+    "KEGG": "KEGG_2021_Human",
+    "GO_BP": "GO_Biological_Process_2021",
+    "GO_MF": "GO_Molecular_Function_2021",
+    "GO_CC": "GO_Cellular_Component_2021",
+    "Reactome": "Reactome_2022",
+}
+
+# Analyzer attribute holding the results of each library
+_RESULT_ATTRS = {
+    "KEGG": "kegg_results",
+    "GO_BP": "go_bp_results",
+    "GO_MF": "go_mf_results",
+    "GO_CC": "go_cc_results",
+    "Reactome": "reactome_results",
+}
+
+
+def _bh_adjust(pvalues: np.ndarray) -> np.ndarray:
+    """Benjamini-Hochberg adjusted p-values (as statsmodels' ``fdr_bh``)."""
+    n = len(pvalues)
+    if n == 0:
+        return pvalues
+    order = np.argsort(pvalues)
+    ranked = pvalues[order] * n / np.arange(1, n + 1)
+    adjusted = np.empty(n)
+    adjusted[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return adjusted
 
 
 class EnrichmentAnalyzer:
@@ -38,9 +74,62 @@ class EnrichmentAnalyzer:
         self.go_mf_results: Optional[pd.DataFrame] = None
         self.go_cc_results: Optional[pd.DataFrame] = None
         self.reactome_results: Optional[pd.DataFrame] = None
+        self._gseapy = None
         
         self._pvalue_threshold = config.get("analysis.enrichment_pvalue_threshold", 0.05)
         self._top_n = config.get("analysis.enrichment_top_n", 20)
+        self._cache_ttl_days = config.get("analysis.enrichr_cache_ttl_days", 30)
+        self._cache_dir = config.data_dir / "cache" / "enrichr"
+        
+        # "local" tests cached gene-set libraries offline instead of calling Enrichr
+        self._backend = config.get("analysis.enrichment_backend", "enrichr")
+        self._library_dir = config.data_dir / "cache" / "libs"
+        self._libraries: Dict[str, Any] = {}
+        # Local backend universe: None (all library genes), a gene count or a gene list
+        self.background = config.get("analysis.enrichment_background", None)
+    
+    def _gp(self):
+        """
+        gseapy module, imported on first use to keep it out of CLI startup.
+        
+        Returns:
+            The gseapy module, or None if it is not installed
+        """
+        if self._gseapy is None:
+            try:
+                import gseapy
+            except ImportError:
+                return None
+            self._gseapy = gseapy
+        return self._gseapy
+    
+    def _backend_ready(self, libraries: List[str]) -> bool:
+        """
+        Check that the configured backend can test the given libraries.
+        
+        gseapy is needed to query Enrichr and to download a missing library;
+        the local backend runs without it once every library is pickled
+        under ``cache/libs``.
+        
+        Args:
+            libraries: Enrichr library names
+            
+        Returns:
+            True if enrichment can run
+        """
+        if self._backend == "local" and HAS_SCIPY:
+            if all((self._library_dir / f"{library}.pkl").exists() for library in libraries):
+                return True
+        
+        if self._gp() is None:
+            print("gseapy not installed. Install with: pip install gseapy")
+            return False
+        return True
+    
+    @staticmethod
+    def _canonicalize(gene_list: List[str]) -> List[str]:
+        """Strip, upper-case, de-duplicate and sort gene symbols."""
+        return sorted({g.strip().upper() for g in gene_list if g and isinstance(g, str)} - {""})
     
     def load_genes(self, filename: str = "common_targets.txt") -> List[str]:
         """
@@ -55,17 +144,213 @@ class EnrichmentAnalyzer:
         path = self.config.data_dir / "processed" / filename
         
         if path.exists():
-            with open(path, "r") as f:
-                self.gene_list = [line.strip().upper() for line in f if line.strip()]
+            self.gene_list = self._canonicalize(path.read_text().splitlines())
         else:
             # Try hub genes
             hub_path = self.config.data_dir / "results" / "hub_genes.csv"
             if hub_path.exists():
                 df = pd.read_csv(hub_path)
-                self.gene_list = df["gene"].tolist()
+                self.gene_list = self._canonicalize(df["gene"].tolist())
         
         return self.gene_list
     
+    def _enrichr(self, gene_list: List[str], library: str) -> pd.DataFrame:
+        """
+        Query Enrichr for one library through gseapy.
+        
+        Args:
+            gene_list: Gene symbols
+            library: Enrichr library name
+            
+        Returns:
+            Results table for the library
+        """
+        enr = self._gp().enrichr(
+            gene_list=gene_list,
+            gene_sets=library,
+            organism="human",
+            outdir=None,
+            cutoff=self._pvalue_threshold
+        )
+        return enr.results
+    
+    def _cache_path(self, gene_list: List[str], library: str) -> Path:
+        """Cache file for one canonical gene list / library pair."""
+        key = hashlib.sha1(("|".join(gene_list) + "::" + library).encode()).hexdigest()
+        return self._cache_dir / f"{key}_{library}.parquet"
+    
+    def _read_cache(self, gene_list: List[str], library: str) -> Optional[pd.DataFrame]:
+        """
+        Load cached Enrichr results if present and younger than the TTL.
+        
+        Returns:
+            Cached DataFrame, or None on a miss
+        """
+        cache_path = self._cache_path(gene_list, library)
+        if not cache_path.exists():
+            return None
+        
+        age_days = (time.time() - cache_path.stat().st_mtime) / 86400
+        if age_days > self._cache_ttl_days:
+            return None
+        
+        try:
+            return pd.read_parquet(cache_path)
+        except (ImportError, OSError, ValueError):
+            return None
+    
+    def _write_cache(self, gene_list: List[str], library: str, df: pd.DataFrame) -> None:
+        """Store Enrichr results; caching is skipped if no parquet engine is available."""
+        if df.empty:
+            return
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            df.to_parquet(self._cache_path(gene_list, library), index=False)
+        except (ImportError, OSError, ValueError):
+            pass
+    
+    def _load_library(self, library: str) -> Dict[str, List[str]]:
+        """
+        Download an Enrichr gene-set library once and keep it pickled on disk.
+        
+        Args:
+            library: Enrichr library name
+            
+        Returns:
+            Dictionary of term -> gene symbols
+        """
+        path = self._library_dir / f"{library}.pkl"
+        if path.exists():
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        
+        gene_sets = self._gp().get_library(name=library, organism="Human")
+        self._library_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(gene_sets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return gene_sets
+    
+    def _library_index(self, library: str) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flattened form of a library for vectorized overlap counts, built once.
+        
+        Returns:
+            Tuple of (terms, gene symbols, gene index of every term member,
+            offset of each term's first member)
+        """
+        if library not in self._libraries:
+            gene_sets = self._load_library(library)
+            members = {term: sorted({g.upper() for g in genes}) for term, genes in gene_sets.items()}
+            terms = [term for term, genes in members.items() if genes]
+            genes = sorted(set().union(*(members[t] for t in terms)))
+            position = {g: i for i, g in enumerate(genes)}
+            flat = np.fromiter((position[g] for t in terms for g in members[t]), dtype=np.int64)
+            sizes = np.fromiter((len(members[t]) for t in terms), dtype=np.int64, count=len(terms))
+            offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+            self._libraries[library] = (terms, np.array(genes, dtype=object), flat, offsets)
+        return self._libraries[library]
+    
+    def _local_enrichr(
+        self,
+        gene_list: List[str],
+        library: str,
+        background: Optional[Any] = None
+    ) -> pd.DataFrame:
+        """
+        Hypergeometric enrichment against a cached library, without HTTP.
+        
+        All terms are tested in one vectorized ``hypergeom.sf`` call and the
+        p-values are Benjamini-Hochberg adjusted. The table has the columns of
+        gseapy's Enrichr results, so downstream steps read it unchanged.
+        
+        Args:
+            gene_list: Canonical gene symbols
+            library: Enrichr library name
+            background: Universe as a gene count or gene list. If None, uses
+                ``self.background``, falling back to all genes in the library.
+            
+        Returns:
+            Results table for terms overlapping the gene list, by p-value
+        """
+        from scipy.stats import hypergeom
+        
+        terms, genes, flat, offsets = self._library_index(library)
+        if background is None:
+            background = self.background
+        if not terms:
+            return pd.DataFrame()
+        
+        if background is None:
+            in_universe = np.ones(len(genes), dtype=bool)
+            N = len(genes)
+        elif isinstance(background, (int, np.integer)):
+            in_universe = np.ones(len(genes), dtype=bool)
+            N = int(background)
+        else:
+            universe = set(self._canonicalize(list(background)))
+            in_universe = np.fromiter((g in universe for g in genes), dtype=bool, count=len(genes))
+            N = len(universe)
+        
+        query = set(gene_list)
+        in_query = np.fromiter((g in query for g in genes), dtype=bool, count=len(genes)) & in_universe
+        n = int(in_query.sum())
+        
+        # Per-term overlap (k) and size within the universe (K)
+        k = np.add.reduceat(in_query[flat].astype(np.int64), offsets)
+        K = np.add.reduceat(in_universe[flat].astype(np.int64), offsets)
+        hits = np.flatnonzero(k)
+        if len(hits) == 0:
+            return pd.DataFrame()
+        k, K = k[hits], K[hits]
+        
+        # Terms share few distinct (k, K) pairs; sf is the costly part, so
+        # evaluate it once per pair
+        pairs, inverse = np.unique(np.stack([k, K], axis=1), axis=0, return_inverse=True)
+        pvalues = hypergeom.sf(pairs[:, 0] - 1, N, pairs[:, 1], n)[inverse.ravel()]
+        # Haldane correction keeps the odds ratio finite for complete overlaps
+        odds = ((k + 0.5) * (N - K - n + k + 0.5)) / ((K - k + 0.5) * (n - k + 0.5))
+        ends = np.append(offsets[1:], len(flat))
+        
+        df = pd.DataFrame({
+            "Gene_set": library,
+            "Term": [terms[i] for i in hits],
+            "Overlap": [f"{a}/{b}" for a, b in zip(k, K)],
+            "P-value": pvalues,
+            "Adjusted P-value": _bh_adjust(pvalues),
+            "Odds Ratio": odds,
+            "Combined Score": -np.log(np.maximum(pvalues, 1e-300)) * odds,
+            "Genes": [
+                ";".join(genes[flat[offsets[i]:ends[i]][in_query[flat[offsets[i]:ends[i]]]]])
+                for i in hits
+            ],
+        })
+        return df.sort_values("P-value", kind="mergesort").reset_index(drop=True)
+    
+    def _cached_enrichr(self, gene_list: List[str], library: str) -> pd.DataFrame:
+        """
+        Query one Enrichr library, reusing results cached on disk.
+        
+        With ``analysis.enrichment_backend: local`` the library is tested
+        offline by ``_local_enrichr`` instead.
+        
+        Args:
+            gene_list: Gene symbols
+            library: Enrichr library name
+            
+        Returns:
+            Results table for the library
+        """
+        if self._backend == "local" and HAS_SCIPY:
+            return self._local_enrichr(gene_list, library)
+        
+        cached = self._read_cache(gene_list, library)
+        if cached is not None:
+            return cached
+        
+        df = self._enrichr(gene_list, library)
+        self._write_cache(gene_list, library, df)
+        return df
+    
     def kegg_enrichment(self, gene_list: Optional[List[str]] = None) -> pd.DataFrame:
         """
         Perform KEGG pathway enrichment.
@@ -76,29 +361,21 @@ class EnrichmentAnalyzer:
         Returns:
             DataFrame with enrichment results
         """
-        if gp is None:
-            print("gseapy not installed. Install with: pip install gseapy")
+        if not self._backend_ready([ENRICHR_LIBRARIES["KEGG"]]):
             return pd.DataFrame()
         
         if gene_list is None:
             if not self.gene_list:
                 self.load_genes()
             gene_list = self.gene_list
+        gene_list = self._canonicalize(gene_list)
         
         if not gene_list:
             print("No genes for enrichment analysis.")
             return pd.DataFrame()
         
         try:
-            enr = gp.enrichr(
-                gene_list=gene_list,
-                gene_sets=["KEGG_2021_Human"],
-                organism="human",
-                outdir=None,
-                cutoff=self._pvalue_threshold
-            )
-            
-            self.kegg_results = enr.results
+            self.kegg_results = self._cached_enrichr(gene_list, ENRICHR_LIBRARIES["KEGG"])
             return self.kegg_results
             
         except Exception as e:
@@ -115,14 +392,14 @@ class EnrichmentAnalyzer:
         Returns:
             Dictionary with BP, MF, CC DataFrames
         """
-        if gp is None:
-            print("gseapy not installed. Install with: pip install gseapy")
+        if not self._backend_ready([ENRICHR_LIBRARIES[name] for name in ("GO_BP", "GO_MF", "GO_CC")]):
             return {}
         
         if gene_list is None:
             if not self.gene_list:
                 self.load_genes()
             gene_list = self.gene_list
+        gene_list = self._canonicalize(gene_list)
         
         if not gene_list:
             print("No genes for enrichment analysis.")
@@ -132,42 +409,21 @@ class EnrichmentAnalyzer:
         
         # GO Biological Process
         try:
-            enr_bp = gp.enrichr(
-                gene_list=gene_list,
-                gene_sets=["GO_Biological_Process_2021"],
-                organism="human",
-                outdir=None,
-                cutoff=self._pvalue_threshold
-            )
-            self.go_bp_results = enr_bp.results
+            self.go_bp_results = self._cached_enrichr(gene_list, ENRICHR_LIBRARIES["GO_BP"])
             results["BP"] = self.go_bp_results
         except Exception as e:
             print(f"GO BP enrichment failed: {e}")
         
         # GO Molecular Function
         try:
-            enr_mf = gp.enrichr(
-                gene_list=gene_list,
-                gene_sets=["GO_Molecular_Function_2021"],
-                organism="human",
-                outdir=None,
-                cutoff=self._pvalue_threshold
-            )
-            self.go_mf_results = enr_mf.results
+            self.go_mf_results = self._cached_enrichr(gene_list, ENRICHR_LIBRARIES["GO_MF"])
             results["MF"] = self.go_mf_results
         except Exception as e:
             print(f"GO MF enrichment failed: {e}")
         
         # GO Cellular Component
         try:
-            enr_cc = gp.enrichr(
-                gene_list=gene_list,
-                gene_sets=["GO_Cellular_Component_2021"],
-                organism="human",
-                outdir=None,
-                cutoff=self._pvalue_threshold
-            )
-            self.go_cc_results = enr_cc.results
+            self.go_cc_results = self._cached_enrichr(gene_list, ENRICHR_LIBRARIES["GO_CC"])
             results["CC"] = self.go_cc_results
         except Exception as e:
             print(f"GO CC enrichment failed: {e}")
@@ -184,28 +440,20 @@ class EnrichmentAnalyzer:
         Returns:
             DataFrame with enrichment results
         """
-        if gp is None:
-            print("gseapy not installed.")
+        if not self._backend_ready([ENRICHR_LIBRARIES["Reactome"]]):
             return pd.DataFrame()
         
         if gene_list is None:
             if not self.gene_list:
                 self.load_genes()
             gene_list = self.gene_list
+        gene_list = self._canonicalize(gene_list)
         
         if not gene_list:
             return pd.DataFrame()
         
         try:
-            enr = gp.enrichr(
-                gene_list=gene_list,
-                gene_sets=["Reactome_2022"],
-                organism="human",
-                outdir=None,
-                cutoff=self._pvalue_threshold
-            )
-            
-            self.reactome_results = enr.results
+            self.reactome_results = self._cached_enrichr(gene_list, ENRICHR_LIBRARIES["Reactome"])
             return self.reactome_results
             
         except Exception as e:
@@ -216,29 +464,50 @@ class EnrichmentAnalyzer:
         """
         Run all enrichment analyses.
         
+        The libraries are independent, so they are queried concurrently on a
+        thread pool (each call mostly waits on HTTP). Libraries found in the
+        on-disk cache are reused without a request.
+        
         Args:
             gene_list: Optional gene list
             
         Returns:
             Dictionary with all results
         """
-        results = {}
-        
-        # KEGG
-        kegg = self.kegg_enrichment(gene_list)
-        if not kegg.empty:
-            results["KEGG"] = kegg
+        if not self._backend_ready(list(ENRICHR_LIBRARIES.values())):
+            return {}
         
-        # GO
-        go = self.go_enrichment(gene_list)
-        results.update({f"GO_{k}": v for k, v in go.items() if not v.empty})
+        if gene_list is None:
+            if not self.gene_list:
+                self.load_genes()
+            gene_list = self.gene_list
+        gene_list = self._canonicalize(gene_list)
         
-        # Reactome
-        reactome = self.reactome_enrichment(gene_list)
-        if not reactome.empty:
-            results["Reactome"] = reactome
+        if not gene_list:
+            print("No genes for enrichment analysis.")
+            return {}
         
-        return results
+        frames = {}
+        with ThreadPoolExecutor(max_workers=len(ENRICHR_LIBRARIES)) as executor:
+            futures = {
+                executor.submit(self._cached_enrichr, gene_list, library): name
+                for name, library in ENRICHR_LIBRARIES.items()
+            }
+            # Completion handling runs on this thread, so no locking is needed
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    frames[name] = future.result()
+                except Exception as e:
+                    print(f"{name} enrichment failed: {e}")
+                    continue
+                setattr(self, _RESULT_ATTRS[name], frames[name])
+        
+        return {
+            name: frames[name]
+            for name in ENRICHR_LIBRARIES
+            if name in frames and not frames[name].empty
+        }
     
     def get_top_pathways(self, n: Optional[int] = None) -> pd.DataFrame:
         """
@@ -253,37 +522,16 @@ class EnrichmentAnalyzer:
         if n is None:
             n = self._top_n
         
-        dfs = []
-        
-        if self.kegg_results is not None and not self.kegg_results.empty:
-            top_kegg = self.kegg_results.head(n).copy()
-            top_kegg["source"] = "KEGG"
-            dfs.append(top_kegg)
-        
-        if self.go_bp_results is not None and not self.go_bp_results.empty:
-            top_bp = self.go_bp_results.head(n).copy()
-            top_bp["source"] = "GO_BP"
-            dfs.append(top_bp)
-        
-        if self.go_mf_results is not None and not self.go_mf_results.empty:
-            top_mf = self.go_mf_results.head(n).copy()
-            top_mf["source"] = "GO_MF"
-            dfs.append(top_mf)
-        
-        if self.go_cc_results is not None and not self.go_cc_results.empty:
-            top_cc = self.go_cc_results.head(n).copy()
-            top_cc["source"] = "GO_CC"
-            dfs.append(top_cc)
+        results = {name: getattr(self, attr) for name, attr in _RESULT_ATTRS.items()}
+        frames = {name: df.head(n) for name, df in results.items() if df is not None and not df.empty}
         
-        if self.reactome_results is not None and not self.reactome_results.empty:
-            top_react = self.reactome_results.head(n).copy()
-            top_react["source"] = "Reactome"
-            dfs.append(top_react)
-        
-        if dfs:
-            return pd.concat(dfs, ignore_index=True)
+        if not frames:
+            return pd.DataFrame()
         
-        return pd.DataFrame()
+        # One concat; the keys become the source column
+        combined = pd.concat(frames.values(), keys=frames.keys(), names=["source", "_row"])
+        combined = combined.reset_index(level="source").reset_index(drop=True)
+        return combined[[c for c in combined.columns if c != "source"] + ["source"]]
     
     def save_results(self) -> Path:
         """
@@ -297,23 +545,23 @@ class EnrichmentAnalyzer:
         
         # Save individual results
         if self.kegg_results is not None and not self.kegg_results.empty:
-            self.kegg_results.to_csv(output_dir / "kegg_enrichment.csv", index=False)
+            write_table(self.kegg_results, output_dir / "kegg_enrichment")
         
         if self.go_bp_results is not None and not self.go_bp_results.empty:
-            self.go_bp_results.to_csv(output_dir / "go_bp_enrichment.csv", index=False)
+            write_table(self.go_bp_results, output_dir / "go_bp_enrichment")
         
         if self.go_mf_results is not None and not self.go_mf_results.empty:
-            self.go_mf_results.to_csv(output_dir / "go_mf_enrichment.csv", index=False)
+            write_table(self.go_mf_results, output_dir / "go_mf_enrichment")
         
         if self.go_cc_results is not None and not self.go_cc_results.empty:
-            self.go_cc_results.to_csv(output_dir / "go_cc_enrichment.csv", index=False)
+            write_table(self.go_cc_results, output_dir / "go_cc_enrichment")
         
         if self.reactome_results is not None and not self.reactome_results.empty:
-            self.reactome_results.to_csv(output_dir / "reactome_enrichment.csv", index=False)
+            write_table(self.reactome_results, output_dir / "reactome_enrichment")
         
         # Save combined top pathways
         top_pathways = self.get_top_pathways()
         if not top_pathways.empty:
-            top_pathways.to_csv(output_dir / "top_pathways_combined.csv", index=False)
+            write_table(top_pathways, output_dir / "top_pathways_combined")
         
         return output_dir
@@ -0,0 +1,58 @@
+"""
+HTTP Utilities Module
+=====================
+
+Shared HTTP session setup and response decoding for the database clients.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+USER_AGENT = "herbal-network-pharmacology/1.0"
+
+
+def make_session(max_retries: int = 5) -> requests.Session:
+    """
+    Create a keep-alive session with the project User-Agent.
+    
+    With retries enabled, rate limiting and transient server errors (429,
+    5xx) are retried with exponential backoff, honouring Retry-After; the
+    last response is returned if all retries fail. The connection pool
+    covers the concurrent requests the clients make.
+    
+    Args:
+        max_retries: Retries per request; 0 keeps requests' default adapters
+    
+    Returns:
+        Configured session
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    
+    if max_retries:
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        for prefix in ("https://", "http://"):
+            session.mount(prefix, HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+    
+    return session
+
+
+def decode_json(response: requests.Response) -> Any:
+    """Decode a JSON response body, with orjson when it is installed."""
+    if HAS_ORJSON:
+        return orjson.loads(response.content)
+    return response.json()
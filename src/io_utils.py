@@ -0,0 +1,39 @@
+"""
+I/O Utilities Module
+====================
+
+Helpers for writing result tables, shared by the analysis steps.
+"""
+
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def write_table(df: pd.DataFrame, path_stem: Path) -> Path:
+    """
+    Write a results table as CSV, plus a zstd-compressed Parquet copy.
+    
+    The CSV is the user-facing result; the Parquet copy (written when
+    pyarrow is installed) is what later steps load when it is up to date.
+    
+    Args:
+        df: Table to write
+        path_stem: Output path without extension
+    
+    Returns:
+        Path of the CSV file
+    """
+    csv_path = path_stem.with_suffix(".csv")
+    df.to_csv(csv_path, index=False)
+    
+    if HAS_PYARROW:
+        parquet_path = path_stem.with_suffix(".parquet")
+        df.to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+    
+    return csv_path
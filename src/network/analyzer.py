@@ -5,12 +5,37 @@ Network Analyzer Module
 Analyzes network topology and identifies hub genes.
 """
 
+import hashlib
+import json
+import random
+from collections import defaultdict
+from itertools import repeat
+import numpy as np
 import pandas as pd
 import networkx as nx
+from networkx.algorithms import approximation as nxapprox
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 
+try:
+    import scipy.sparse as sp
+    from scipy.sparse import csgraph
+    from scipy.sparse.linalg import eigsh, ArpackNoConvergence
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+try:
+    import igraph as ig
+    HAS_IGRAPH = True
+except ImportError:
+    HAS_IGRAPH = False
+
 from ..config_loader import Config
+from ..io_utils import write_table
+
+# Source rows per shortest-path block; bounds closeness memory to block × nodes
+_CLOSENESS_BLOCK = 512
 
 
 class NetworkAnalyzer:
@@ -28,6 +53,45 @@ class NetworkAnalyzer:
         self.network = network
         self.hub_genes: List[Dict[str, Any]] = []
         self.centrality_metrics: Dict[str, Dict[str, float]] = {}
+        
+        self._csr = None
+        self._nodes: List[str] = []
+        self._csr_key: Optional[Tuple[int, int, int]] = None
+        self._ig_graph = None
+        self._ig_key: Optional[Tuple[int, int, int]] = None
+        
+        self._centrality_backend = config.get("analysis.centrality_backend", "igraph")
+        
+        self._centrality_df: Optional[pd.DataFrame] = None
+        self._centrality_graph_id: Optional[Tuple[int, int, int]] = None
+    
+    def _graph_key(self) -> Tuple[int, int, int]:
+        """Identity of the current network, used to invalidate derived structures."""
+        return (id(self.network), self.network.number_of_nodes(), self.network.number_of_edges())
+    
+    def _igraph(self) -> "ig.Graph":
+        """igraph copy of the network (node names in the "_nx_name" attribute), built once per graph."""
+        key = self._graph_key()
+        if self._ig_key != key:
+            self._ig_graph = ig.Graph.from_networkx(self.network)
+            self._ig_key = key
+        return self._ig_graph
+    
+    def _adjacency(self) -> Tuple["sp.csr_array", List[str]]:
+        """
+        Unweighted CSR adjacency matrix of the network, built once per graph.
+        
+        Returns:
+            Tuple of (adjacency matrix, node list in row order)
+        """
+        key = self._graph_key()
+        if self._csr_key != key:
+            self._nodes = list(self.network.nodes())
+            self._csr = nx.to_scipy_sparse_array(
+                self.network, nodelist=self._nodes, weight=None, format="csr"
+            )
+            self._csr_key = key
+        return self._csr, self._nodes
     
     def load_network(self, filename: str = "network.graphml") -> nx.Graph:
         """
@@ -43,6 +107,20 @@ class NetworkAnalyzer:
         
         if path.exists():
             self.network = nx.read_graphml(path)
+            
+            # igraph fills attributes missing on an element with ""/NaN, so
+            # the NetworkX graph always comes from nx.read_graphml; igraph's
+            # C reader only supplies the handle the centralities use, which
+            # saves converting the graph with from_networkx later
+            backend = self.config.get("io.graphml_backend", "igraph")
+            if backend == "igraph" and HAS_IGRAPH and not self.network.is_multigraph():
+                g = ig.Graph.Read_GraphML(str(path))
+                if (g.vcount(), g.ecount()) == (self.network.number_of_nodes(), self.network.number_of_edges()):
+                    g.vs["_nx_name"] = list(self.network.nodes())
+                    self._ig_graph = g
+                    self._ig_key = self._graph_key()
+            self._centrality_df = None
+            self._centrality_graph_id = None
             return self.network
         else:
             raise FileNotFoundError(f"Network file not found: {path}")
@@ -57,7 +135,13 @@ class NetworkAnalyzer:
         if self.network is None:
             raise ValueError("No network loaded.")
         
-        dc = nx.degree_centrality(self.network)
+        if HAS_SCIPY and self.network.number_of_nodes() > 1:
+            A, nodes = self._adjacency()
+            # Self-loops count twice towards a node's degree, as in NetworkX
+            degree = A.sum(axis=1) + A.diagonal()
+            dc = dict(zip(nodes, (degree / (len(nodes) - 1)).tolist()))
+        else:
+            dc = nx.degree_centrality(self.network)
         self.centrality_metrics["degree"] = dc
         return dc
     
@@ -65,13 +149,34 @@ class NetworkAnalyzer:
         """
         Calculate betweenness centrality for all nodes.
         
+        Uses igraph's C implementation when installed and
+        ``analysis.centrality_backend`` is "igraph" (the default), otherwise
+        NetworkX. On the NetworkX path, ``analysis.betweenness_samples`` can
+        limit Brandes to that many random source nodes (seed 42): O(k·E)
+        instead of O(V·E), with approximate values whose top-ranked nodes
+        are usually unchanged. Unset (the default) computes it exactly.
+        
         Returns:
             Dictionary of node -> betweenness centrality
         """
         if self.network is None:
             raise ValueError("No network loaded.")
         
-        bc = nx.betweenness_centrality(self.network)
+        n = self.network.number_of_nodes()
+        if HAS_IGRAPH and self._centrality_backend == "igraph" and n > 2:
+            g = self._igraph()
+            # igraph counts each pair once; rescale to NetworkX's normalized values
+            scale = 2.0 / ((n - 1) * (n - 2))
+            bc = {
+                name: value * scale
+                for name, value in zip(g.vs["_nx_name"], g.betweenness(directed=False))
+            }
+        else:
+            k = self.config.get("analysis.betweenness_samples", None)
+            if k is not None and k < n:
+                bc = nx.betweenness_centrality(self.network, k=k, seed=42)
+            else:
+                bc = nx.betweenness_centrality(self.network)
         self.centrality_metrics["betweenness"] = bc
         return bc
     
@@ -79,13 +184,23 @@ class NetworkAnalyzer:
         """
         Calculate closeness centrality for all nodes.
         
+        Uses igraph's BFS when installed and ``analysis.centrality_backend``
+        is "igraph", otherwise blocked scipy shortest paths, and NetworkX
+        only when neither is available.
+        
         Returns:
             Dictionary of node -> closeness centrality
         """
         if self.network is None:
             raise ValueError("No network loaded.")
         
-        cc = nx.closeness_centrality(self.network)
+        n = self.network.number_of_nodes()
+        if HAS_IGRAPH and self._centrality_backend == "igraph" and n > 1:
+            cc = self._closeness_igraph()
+        elif HAS_SCIPY and n > 1:
+            cc = self._closeness_sparse()
+        else:
+            cc = nx.closeness_centrality(self.network)
         self.centrality_metrics["closeness"] = cc
         return cc
     
@@ -100,42 +215,154 @@ class NetworkAnalyzer:
             raise ValueError("No network loaded.")
         
         try:
-            ec = nx.eigenvector_centrality(self.network, max_iter=1000)
+            if HAS_SCIPY and self.network.number_of_nodes() > 0:
+                ec = self._eigenvector_sparse()
+            else:
+                ec = nx.eigenvector_centrality(self.network, max_iter=1000)
             self.centrality_metrics["eigenvector"] = ec
             return ec
-        except nx.PowerIterationFailedConvergence:
+        except (nx.PowerIterationFailedConvergence, *((ArpackNoConvergence,) if HAS_SCIPY else ())):
             print("Warning: Eigenvector centrality did not converge.")
             return {}
     
+    def _closeness_igraph(self) -> Dict[str, float]:
+        """
+        Closeness centrality from igraph, rescaled to NetworkX's values.
+        
+        igraph normalizes by the nodes each node can reach; multiplying by
+        reachable / (n - 1) gives the Wasserman-Faust scaling that
+        nx.closeness_centrality uses for disconnected graphs.
+        """
+        g = self._igraph()
+        n = g.vcount()
+        components = g.connected_components()
+        reachable = np.asarray(components.sizes())[components.membership] - 1
+        # Isolated nodes come back as NaN
+        values = np.nan_to_num(np.asarray(g.closeness(normalized=True), dtype=float))
+        return dict(zip(g.vs["_nx_name"], (values * reachable / (n - 1)).tolist()))
+    
+    def _closeness_sparse(self) -> Dict[str, float]:
+        """
+        Closeness centrality from BFS distances computed on the CSR matrix.
+        
+        Uses the Wasserman-Faust scaling for disconnected graphs, matching
+        nx.closeness_centrality. Sources are processed in blocks so memory
+        stays at block × nodes instead of a full distance matrix.
+        """
+        A, nodes = self._adjacency()
+        n = len(nodes)
+        closeness = np.zeros(n)
+        
+        for start in range(0, n, _CLOSENESS_BLOCK):
+            rows = np.arange(start, min(start + _CLOSENESS_BLOCK, n))
+            dist = csgraph.shortest_path(A, directed=False, unweighted=True, indices=rows)
+            reachable = np.isfinite(dist)
+            n_reach = reachable.sum(axis=1) - 1
+            total = np.where(reachable, dist, 0).sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                closeness[rows] = np.where(total > 0, n_reach * n_reach / ((n - 1) * total), 0.0)
+        
+        return dict(zip(nodes, closeness.tolist()))
+    
+    def _eigenvector_sparse(self) -> Dict[str, float]:
+        """
+        Eigenvector centrality as the principal eigenvector of the adjacency matrix.
+        
+        Solved with ARPACK (Lanczos) instead of Python power iteration; the
+        vector is made non-negative and scaled to unit length like NetworkX.
+        """
+        A, nodes = self._adjacency()
+        n = len(nodes)
+        
+        if A.nnz == 0:
+            vec = np.ones(n)
+        elif n < 3:
+            _, vecs = np.linalg.eigh(A.toarray().astype(float))
+            vec = vecs[:, -1]
+        else:
+            _, vecs = eigsh(A.astype(float), k=1, which="LA")
+            vec = vecs[:, 0]
+        
+        vec = np.abs(vec)
+        vec /= np.linalg.norm(vec)
+        return dict(zip(nodes, vec.tolist()))
+    
+    def _network_hash(self) -> str:
+        """
+        Content hash of the network's nodes, edges and centrality settings.
+        
+        Node names are part of the hash (unlike a Weisfeiler-Lehman hash) so
+        two isomorphic networks of different genes never share cached values.
+        """
+        h = hashlib.sha1()
+        h.update("\n".join(sorted(map(str, self.network.nodes()))).encode())
+        h.update(b"\x00")
+        edges = sorted("\t".join(sorted((str(u), str(v)))) for u, v in self.network.edges())
+        h.update("\n".join(edges).encode())
+        h.update(f"{self._centrality_backend}|{self.config.get('analysis.betweenness_samples', None)}".encode())
+        return h.hexdigest()
+    
+    def _centrality_cache_path(self) -> Path:
+        """Parquet file holding the centralities of the current network."""
+        return self.config.data_dir / "cache" / "centralities" / f"centralities_{self._network_hash()}.parquet"
+    
     def calculate_all_centralities(self) -> pd.DataFrame:
         """
         Calculate all centrality metrics.
         
+        The result is cached until the network changes, so calling this from
+        both identify_hub_genes and save_analysis computes it once. It is also
+        stored as parquet keyed by the network's content hash, so reruns on
+        the same network load it instead of recomputing.
+        
         Returns:
             DataFrame with all centrality values
         """
         if self.network is None:
             raise ValueError("No network loaded.")
         
+        graph_id = self._graph_key()
+        if self._centrality_df is not None and self._centrality_graph_id == graph_id:
+            return self._centrality_df.copy()
+        
+        cache_path = self._centrality_cache_path()
+        if cache_path.exists():
+            try:
+                df = pd.read_parquet(cache_path)
+            except (ImportError, OSError, ValueError):
+                df = None
+            if df is not None:
+                for metric in ["degree", "betweenness", "closeness", "eigenvector"]:
+                    self.centrality_metrics[metric] = dict(zip(df["gene"], df[f"{metric}_centrality"]))
+                self._centrality_df = df
+                self._centrality_graph_id = graph_id
+                return self._centrality_df.copy()
+        
         self.calculate_degree_centrality()
         self.calculate_betweenness_centrality()
         self.calculate_closeness_centrality()
         self.calculate_eigenvector_centrality()
         
-        # Combine into DataFrame
-        data = []
-        for node in self.network.nodes():
-            node_data = {
-                "gene": node,
-                "degree": self.network.degree(node),
-                "degree_centrality": self.centrality_metrics.get("degree", {}).get(node, 0),
-                "betweenness_centrality": self.centrality_metrics.get("betweenness", {}).get(node, 0),
-                "closeness_centrality": self.centrality_metrics.get("closeness", {}).get(node, 0),
-                "eigenvector_centrality": self.centrality_metrics.get("eigenvector", {}).get(node, 0),
-            }
-            data.append(node_data)
+        # Combine into DataFrame, built column by column in node order
+        nodes = list(self.network.nodes())
+        columns = {
+            "gene": nodes,
+            "degree": [degree for _, degree in self.network.degree(nodes)],
+        }
+        for metric in ["degree", "betweenness", "closeness", "eigenvector"]:
+            values = self.centrality_metrics.get(metric, {})
+            columns[f"{metric}_centrality"] = list(map(values.get, nodes, repeat(0)))
+        
+        self._centrality_df = pd.DataFrame(columns)
+        self._centrality_graph_id = graph_id
+        
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._centrality_df.to_parquet(cache_path, index=False)
+        except (ImportError, OSError, ValueError):
+            pass  # No parquet engine; the in-memory cache still applies
         
-        return pd.DataFrame(data)
+        return self._centrality_df.copy()
     
     def identify_hub_genes(self, top_n: Optional[int] = None, method: str = "degree") -> List[Dict[str, Any]]:
         """
@@ -154,23 +381,22 @@ class NetworkAnalyzer:
         if top_n is None:
             top_n = self.config.get("analysis.hub_gene_top_n", 10)
         
-        # Calculate centralities if not done
+        # Calculate centralities if not done; the frame is cached, so
+        # save_analysis reuses it and the hub table keeps all four metrics
         centrality_df = self.calculate_all_centralities()
         
         # Sort by method
         if method == "combined":
-            # Normalize and combine metrics
-            for col in ["degree_centrality", "betweenness_centrality", "closeness_centrality", "eigenvector_centrality"]:
-                if col in centrality_df.columns:
-                    max_val = centrality_df[col].max()
-                    if max_val > 0:
-                        centrality_df[f"{col}_norm"] = centrality_df[col] / max_val
-                    else:
-                        centrality_df[f"{col}_norm"] = 0
-            
-            # Combined score (average of normalized metrics)
-            norm_cols = [c for c in centrality_df.columns if c.endswith("_norm")]
-            centrality_df["combined_score"] = centrality_df[norm_cols].mean(axis=1)
+            # Normalize each metric by its maximum and average, as one array op
+            cols = [c for c in ["degree_centrality", "betweenness_centrality",
+                                "closeness_centrality", "eigenvector_centrality"]
+                    if c in centrality_df.columns]
+            matrix = centrality_df[cols].to_numpy(dtype=np.float64, copy=True)
+            maxes = matrix.max(axis=0) if len(matrix) else np.ones(len(cols))
+            maxes[maxes <= 0] = 1.0
+            matrix /= maxes
+            centrality_df[[f"{c}_norm" for c in cols]] = matrix
+            centrality_df["combined_score"] = matrix.mean(axis=1)
             
             sorted_df = centrality_df.sort_values("combined_score", ascending=False)
         else:
@@ -183,6 +409,30 @@ class NetworkAnalyzer:
         
         return self.hub_genes
     
+    def _path_statistics(self, graph: nx.Graph) -> Tuple[int, float]:
+        """
+        Diameter and average shortest path length of a connected graph.
+        
+        Both are exact up to ``analysis.exact_diameter_threshold`` nodes
+        (default 500). Larger graphs use the 2-sweep lower bound for the
+        diameter and average BFS distances from 200 sampled sources, which
+        is linear per source instead of all-pairs.
+        
+        Returns:
+            Tuple of (diameter, average path length)
+        """
+        n = graph.number_of_nodes()
+        if n <= self.config.get("analysis.exact_diameter_threshold", 500):
+            return nx.diameter(graph), nx.average_shortest_path_length(graph)
+        
+        diameter = nxapprox.diameter(graph, seed=42)
+        sources = random.Random(42).sample(list(graph), min(200, n))
+        total = sum(
+            sum(nx.single_source_shortest_path_length(graph, source).values())
+            for source in sources
+        )
+        return diameter, total / (len(sources) * (n - 1))
+    
     def get_network_statistics(self) -> Dict[str, Any]:
         """
         Calculate network statistics.
@@ -200,19 +450,19 @@ class NetworkAnalyzer:
             "average_degree": sum(dict(self.network.degree()).values()) / self.network.number_of_nodes() if self.network.number_of_nodes() > 0 else 0,
         }
         
-        # Check if connected
-        if nx.is_connected(self.network):
-            stats["diameter"] = nx.diameter(self.network)
-            stats["average_path_length"] = nx.average_shortest_path_length(self.network)
-        else:
+        # One traversal gives connectivity, the component count and the largest component
+        components = list(nx.connected_components(self.network))
+        if len(components) == 1:
+            stats["diameter"], stats["average_path_length"] = self._path_statistics(self.network)
+        elif components:
             # Get largest component stats
-            largest_cc = max(nx.connected_components(self.network), key=len)
+            largest_cc = max(components, key=len)
+            # Frozen view sharing the network's data, no edge copy; copy before mutating it
             subgraph = self.network.subgraph(largest_cc)
             stats["largest_component_nodes"] = len(largest_cc)
-            stats["number_of_components"] = nx.number_connected_components(self.network)
+            stats["number_of_components"] = len(components)
             if len(largest_cc) > 1:
-                stats["diameter_largest"] = nx.diameter(subgraph)
-                stats["average_path_length_largest"] = nx.average_shortest_path_length(subgraph)
+                stats["diameter_largest"], stats["average_path_length_largest"] = self._path_statistics(subgraph)
         
         # Clustering coefficient
         stats["average_clustering"] = nx.average_clustering(self.network)
@@ -223,6 +473,9 @@ class NetworkAnalyzer:
         """
         Perform community detection using Louvain algorithm.
         
+        Uses igraph's community_multilevel when igraph is installed and
+        ``analysis.centrality_backend`` is "igraph", otherwise NetworkX.
+        
         Returns:
             Dictionary of cluster_id -> list of genes
         """
@@ -230,8 +483,18 @@ class NetworkAnalyzer:
             raise ValueError("No network loaded.")
         
         try:
-            from networkx.algorithms import community
-            communities = community.louvain_communities(self.network)
+            if HAS_IGRAPH and self._centrality_backend == "igraph" and self.network.number_of_nodes() > 0:
+                # igraph's multilevel (Louvain) runs in C; weighted like NetworkX's default
+                g = self._igraph()
+                weights = "weight" if "weight" in g.es.attributes() else None
+                membership = g.community_multilevel(weights=weights).membership
+                grouped = defaultdict(list)
+                for name, cluster_id in zip(g.vs["_nx_name"], membership):
+                    grouped[cluster_id].append(name)
+                communities = [grouped[cluster_id] for cluster_id in sorted(grouped)]
+            else:
+                from networkx.algorithms import community
+                communities = community.louvain_communities(self.network)
             
             clusters = {}
             for i, comm in enumerate(communities):
@@ -255,19 +518,16 @@ class NetworkAnalyzer:
         
         # Save centrality metrics
         centrality_df = self.calculate_all_centralities()
-        centrality_path = output_dir / "network_centralities.csv"
-        centrality_df.to_csv(centrality_path, index=False)
+        centrality_path = write_table(centrality_df, output_dir / "network_centralities")
         
         # Save hub genes
         if self.hub_genes:
             hub_df = pd.DataFrame(self.hub_genes)
-            hub_path = output_dir / "hub_genes.csv"
-            hub_df.to_csv(hub_path, index=False)
+            write_table(hub_df, output_dir / "hub_genes")
         
         # Save network statistics
         stats = self.get_network_statistics()
         stats_path = output_dir / "network_statistics.json"
-        import json
         with open(stats_path, "w") as f:
             json.dump(stats, f, indent=2)
         
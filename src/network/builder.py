@@ -6,14 +6,46 @@ Builds protein-protein interaction networks using STRING database.
 """
 
 import pandas as pd
-import requests
 import networkx as nx
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
+from urllib.parse import urlencode
 from typing import List, Dict, Optional, Set, Any
 from tqdm import tqdm
+import functools
+import gzip
+import hashlib
 import json
+import time
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 from ..config_loader import Config
+from ..http_utils import make_session, decode_json
+from ..io_utils import write_table
+
+# Shared keep-alive session so consecutive STRING requests reuse the TLS
+# connection, with retries on 429 and 5xx responses
+_HTTP = make_session()
+
+# Network requests send a pre-encoded body, so the content type is explicit
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+@functools.lru_cache(maxsize=32)
+def _identifiers_body(genes: tuple) -> bytes:
+    """
+    Form-encoded ``identifiers`` field for a gene list.
+    
+    Threshold sweeps over the same genes reuse the encoded bytes; the cache
+    is bounded to the most recent gene lists.
+    """
+    return urlencode({"identifiers": "%0d".join(genes)}).encode()
 
 
 class NetworkBuilder:
@@ -21,6 +53,11 @@ class NetworkBuilder:
     
     STRING_API_URL = "https://string-db.org/api"
     
+    # Genes per STRING request block (a request carries two blocks, so at
+    # most 300 identifiers) and requests in flight at once
+    _BATCH = 150
+    _MAX_CONCURRENT = 8
+    
     def __init__(self, config: Config):
         """
         Initialize the builder.
@@ -35,6 +72,8 @@ class NetworkBuilder:
         self.network: Optional[nx.Graph] = None
         self._species = config.get("api.string.species", 9606)  # Human
         self._score_threshold = config.get("api.string.score_threshold", 400)
+        self._cache_ttl_days = config.get("api.string.cache_ttl_days", 30)
+        self._cache_dir = config.data_dir / "cache" / "string"
     
     def load_drug_targets(self, filename: str = "unique_targets.txt") -> List[str]:
         """
@@ -49,13 +88,13 @@ class NetworkBuilder:
         path = self.config.data_dir / "processed" / filename
         
         if path.exists():
-            with open(path, "r") as f:
-                self.drug_targets = [line.strip().upper() for line in f if line.strip()]
+            lines = (line.strip() for line in path.read_text().upper().splitlines())
+            self.drug_targets = [line for line in lines if line]
         else:
             # Try loading from CSV
             csv_path = self.config.data_dir / "processed" / "predicted_targets.csv"
             if csv_path.exists():
-                df = pd.read_csv(csv_path)
+                df = pd.read_csv(csv_path, usecols=["gene_symbol"])
                 self.drug_targets = list(df["gene_symbol"].dropna().str.upper().unique())
         
         return self.drug_targets
@@ -73,13 +112,13 @@ class NetworkBuilder:
         path = self.config.data_dir / "raw" / filename
         
         if path.exists():
-            with open(path, "r") as f:
-                self.disease_genes = [line.strip().upper() for line in f if line.strip()]
+            lines = (line.strip() for line in path.read_text().upper().splitlines())
+            self.disease_genes = [line for line in lines if line]
         else:
             # Try loading from CSV
             csv_path = self.config.data_dir / "raw" / "disease_genes.csv"
             if csv_path.exists():
-                df = pd.read_csv(csv_path)
+                df = pd.read_csv(csv_path, usecols=["gene_symbol"])
                 self.disease_genes = list(df["gene_symbol"].dropna().str.upper().unique())
         
         return self.disease_genes
@@ -99,7 +138,8 @@ class NetworkBuilder:
         drug_set = set(self.drug_targets)
         disease_set = set(self.disease_genes)
         
-        self.common_targets = list(drug_set & disease_set)
+        # Sorted so the files written below are identical between runs
+        self.common_targets = sorted(drug_set.intersection(disease_set))
         
         print(f"Drug targets: {len(self.drug_targets)}")
         print(f"Disease genes: {len(self.disease_genes)}")
@@ -107,14 +147,17 @@ class NetworkBuilder:
         
         # Save Venn diagram data
         venn_data = {
-            "drug_targets_only": list(drug_set - disease_set),
-            "disease_genes_only": list(disease_set - drug_set),
+            "drug_targets_only": sorted(drug_set.difference(disease_set)),
+            "disease_genes_only": sorted(disease_set.difference(drug_set)),
             "common": self.common_targets
         }
         
         venn_path = self.config.data_dir / "processed" / "venn_data.json"
-        with open(venn_path, "w") as f:
-            json.dump(venn_data, f, indent=2)
+        if HAS_ORJSON:
+            venn_path.write_bytes(orjson.dumps(venn_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(venn_path, "w") as f:
+                json.dump(venn_data, f, indent=2)
         
         # Save common targets
         common_path = self.config.data_dir / "processed" / "common_targets.txt"
@@ -123,48 +166,166 @@ class NetworkBuilder:
         
         return self.common_targets
     
-    def _query_string_network(self, genes: List[str]) -> List[Dict]:
+    def _cache_path(self, kind: str, genes: List[str], params: str) -> Path:
+        """Cache file for one STRING query (gene order does not matter)."""
+        key = hashlib.blake2b(
+            ("|".join(sorted(genes)) + f"::{kind}:{params}").encode(), digest_size=20
+        ).hexdigest()
+        return self._cache_dir / f"{kind}_{key}.json.gz"
+    
+    def _read_cache(self, path: Path) -> Optional[Any]:
         """
-        Query STRING database for PPI network.
+        Load a cached STRING response if present and younger than the TTL.
+        
+        Returns:
+            Decoded response, or None on a miss
+        """
+        if not path.exists():
+            return None
+        
+        age_days = (time.time() - path.stat().st_mtime) / 86400
+        if age_days > self._cache_ttl_days:
+            return None
+        
+        try:
+            with gzip.open(path, "rb") as f:
+                raw = f.read()
+            return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_cache(self, path: Path, data: Any) -> None:
+        """Store a STRING response; empty (possibly failed) responses are not cached."""
+        if not data:
+            return
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            raw = orjson.dumps(data) if HAS_ORJSON else json.dumps(data).encode()
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(raw)
+            tmp_path.replace(path)
+        except OSError:
+            pass
+    
+    def _post_string_network(self, genes: List[str], score_threshold: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Send one STRING network request.
         
         Args:
             genes: List of gene symbols
+            score_threshold: Required STRING score. If None, uses the config value.
             
         Returns:
-            List of interaction records
+            List of interaction records, or None if the request failed
         """
         url = f"{self.STRING_API_URL}/json/network"
         
-        params = {
-            "identifiers": "%0d".join(genes),
+        if score_threshold is None:
+            score_threshold = self._score_threshold
+        params = urlencode({
             "species": self._species,
-            "required_score": self._score_threshold,
+            "required_score": score_threshold,
             "network_type": "functional"
-        }
+        })
+        body = _identifiers_body(tuple(genes)) + b"&" + params.encode()
         
         try:
-            response = requests.post(url, data=params, timeout=120)
+            response = _HTTP.post(url, data=body, headers=_FORM_HEADERS, timeout=120)
             
             if response.status_code == 200:
-                return response.json()
+                return decode_json(response)
             else:
                 print(f"STRING API error: {response.status_code}")
-                return []
+                return None
                 
         except Exception as e:
             print(f"STRING query failed: {e}")
-            return []
+            return None
+    
+    def _query_string_network(self, genes: List[str], score_threshold: Optional[int] = None) -> List[Dict]:
+        """
+        Query STRING database for PPI network.
+        
+        Lists longer than ``_BATCH`` are split into blocks, which keeps each
+        request well under STRING's identifier limits. STRING only
+        reports interactions among the genes of one request, so every pair
+        of blocks is sent together; the requests run concurrently on one
+        keep-alive session and repeated records are dropped.
+        
+        Responses are cached on disk under ``cache/string`` for
+        ``api.string.cache_ttl_days`` (default 30), keyed by the gene set,
+        species and score threshold. Results are only cached when every
+        request succeeded, so a failed block pair is retried next time
+        instead of leaving its edges out for the whole TTL.
+        
+        Args:
+            genes: List of gene symbols
+            score_threshold: Required STRING score. If None, uses the config value.
+            
+        Returns:
+            List of interaction records
+        """
+        if score_threshold is None:
+            score_threshold = self._score_threshold
+        cache_path = self._cache_path(
+            "network", genes, f"{self._species}:{score_threshold}"
+        )
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
+        blocks = [genes[i:i + self._BATCH] for i in range(0, len(genes), self._BATCH)]
+        if len(blocks) <= 1:
+            interactions = self._post_string_network(genes, score_threshold)
+            if interactions is None:
+                return []
+            self._write_cache(cache_path, interactions)
+            return interactions
+        
+        batches = [
+            blocks[i] + blocks[j]
+            for i in range(len(blocks))
+            for j in range(i + 1, len(blocks))
+        ]
+        
+        interactions = []
+        seen = set()
+        complete = True
+        with ThreadPoolExecutor(max_workers=min(self._MAX_CONCURRENT, len(batches))) as executor:
+            for records in executor.map(self._post_string_network, batches, repeat(score_threshold)):
+                if records is None:
+                    complete = False
+                    continue
+                for record in records:
+                    key = (record.get("stringId_A"), record.get("stringId_B"))
+                    if key not in seen:
+                        seen.add(key)
+                        interactions.append(record)
+        
+        if complete:
+            self._write_cache(cache_path, interactions)
+        else:
+            print("Some STRING requests failed; the partial network was not cached.")
+        return interactions
     
     def _query_string_enrichment(self, genes: List[str]) -> Dict:
         """
         Get functional enrichment from STRING.
         
+        Cached on disk like ``_query_string_network``.
+        
         Args:
             genes: List of gene symbols
             
         Returns:
             Enrichment results
         """
+        cache_path = self._cache_path("enrichment", genes, str(self._species))
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
         url = f"{self.STRING_API_URL}/json/enrichment"
         
         params = {
@@ -173,22 +334,30 @@ class NetworkBuilder:
         }
         
         try:
-            response = requests.post(url, data=params, timeout=120)
+            response = _HTTP.post(url, data=params, timeout=120)
             
             if response.status_code == 200:
-                return response.json()
+                data = decode_json(response)
+                self._write_cache(cache_path, data)
+                return data
             else:
                 return {}
                 
         except Exception:
             return {}
     
-    def build_ppi_network(self, genes: Optional[List[str]] = None) -> nx.Graph:
+    def build_ppi_network(
+        self,
+        genes: Optional[List[str]] = None,
+        score_threshold: Optional[int] = None
+    ) -> nx.Graph:
         """
         Build PPI network from STRING database.
         
         Args:
             genes: Optional gene list. If None, uses common_targets.
+            score_threshold: Required STRING score. If None, uses the config
+                value; pass it to sweep thresholds over one gene list.
             
         Returns:
             NetworkX graph
@@ -204,23 +373,33 @@ class NetworkBuilder:
         
         print(f"Querying STRING database for {len(genes)} genes...")
         
-        interactions = self._query_string_network(genes)
+        interactions = self._query_string_network(genes, score_threshold)
         
         # Build NetworkX graph
         self.network = nx.Graph()
         
+        # A pair can come back more than once (both orientations, or from
+        # overlapping request blocks); keep one edge per unordered pair with
+        # the last score, as repeated add_edge calls would
+        ends: Dict[tuple, tuple] = {}
+        scores: Dict[tuple, Any] = {}
         for interaction in interactions:
             node1 = interaction.get("preferredName_A", interaction.get("stringId_A", ""))
             node2 = interaction.get("preferredName_B", interaction.get("stringId_B", ""))
-            score = interaction.get("score", 0)
             
             if node1 and node2:
-                self.network.add_edge(node1, node2, weight=score)
+                key = (node1, node2) if node1 <= node2 else (node2, node1)
+                ends.setdefault(key, (node1, node2))
+                scores[key] = interaction.get("score", 0)
+        
+        # One bulk insert instead of an add_edge call per interaction
+        self.network.add_weighted_edges_from(
+            (node1, node2, scores[key]) for key, (node1, node2) in ends.items()
+        )
         
-        # Add isolated nodes (genes with no interactions)
-        for gene in genes:
-            if gene not in self.network:
-                self.network.add_node(gene)
+        # Add isolated nodes (genes with no interactions); genes already in
+        # the graph are left untouched by add_nodes_from
+        self.network.add_nodes_from(genes)
         
         print(f"Network built: {self.network.number_of_nodes()} nodes, {self.network.number_of_edges()} edges")
         
@@ -243,15 +422,18 @@ class NetworkBuilder:
         
         G = nx.Graph()
         
-        for _, row in df.iterrows():
-            compound = row.get("compound_name", "")
-            target = row.get("gene_symbol", "")
-            
-            if compound and target:
-                # Add nodes with type attribute
-                G.add_node(compound, node_type="compound")
-                G.add_node(target, node_type="target")
-                G.add_edge(compound, target)
+        if not {"compound_name", "gene_symbol"}.issubset(df.columns):
+            return G
+        
+        pairs = df[["compound_name", "gene_symbol"]].dropna()
+        pairs = pairs[(pairs["compound_name"] != "") & (pairs["gene_symbol"] != "")]
+        compounds = pairs["compound_name"].tolist()
+        targets = pairs["gene_symbol"].tolist()
+        
+        # Bulk insert, then tag nodes with their type
+        G.add_edges_from(zip(compounds, targets))
+        nx.set_node_attributes(G, dict.fromkeys(compounds, "compound"), "node_type")
+        nx.set_node_attributes(G, dict.fromkeys(targets, "target"), "node_type")
         
         return G
     
@@ -259,6 +441,9 @@ class NetworkBuilder:
         """
         Export network in GraphML format for Cytoscape.
         
+        NetworkX already writes GraphML through lxml when it is installed.
+        A filename ending in ".gz" is written gzip-compressed.
+        
         Args:
             filename: Output filename
             
@@ -290,29 +475,15 @@ class NetworkBuilder:
         # Save as GraphML
         graphml_path = self.export_to_cytoscape()
         
-        # Save edge list as CSV
-        edges_data = []
-        for u, v, d in self.network.edges(data=True):
-            edges_data.append({
-                "source": u,
-                "target": v,
-                "weight": d.get("weight", 1.0)
-            })
-        
-        edges_df = pd.DataFrame(edges_data)
-        edges_path = self.config.data_dir / "results" / "network_edges.csv"
-        edges_df.to_csv(edges_path, index=False)
+        # Save edge list; tuples straight from the graph, no per-edge dicts
+        edges_df = pd.DataFrame(
+            self.network.edges(data="weight", default=1.0),
+            columns=["source", "target", "weight"]
+        )
+        write_table(edges_df, self.config.data_dir / "results" / "network_edges")
         
         # Save node list
-        nodes_data = []
-        for node in self.network.nodes():
-            nodes_data.append({
-                "node": node,
-                "degree": self.network.degree(node)
-            })
-        
-        nodes_df = pd.DataFrame(nodes_data)
-        nodes_path = self.config.data_dir / "results" / "network_nodes.csv"
-        nodes_df.to_csv(nodes_path, index=False)
+        nodes_df = pd.DataFrame(self.network.degree(), columns=["node", "degree"])
+        write_table(nodes_df, self.config.data_dir / "results" / "network_nodes")
         
         return graphml_path
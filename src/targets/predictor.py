@@ -9,18 +9,154 @@ Predicts drug targets for compounds using:
 
 import pandas as pd
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Tuple
 from tqdm import tqdm
+import hashlib
 import json
 
+try:
+    from rdkit import Chem
+    HAS_RDKIT = True
+except ImportError:
+    HAS_RDKIT = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
 from ..config_loader import Config
+from ..http_utils import make_session, decode_json
+
+# Shared keep-alive session for all prediction services
+_HTTP = make_session()
+
+# Columns of TargetPredictor.predictions, in output order
+_PREDICTION_COLUMNS = (
+    "compound_name", "compound_smiles", "target_name", "target_uniprot",
+    "gene_symbol", "probability", "source",
+)
+
+# STITCH identifiers of chemicals (as opposed to proteins) start with these
+_STITCH_CHEMICAL_PREFIXES = ("CID", "s")
+
+
+def _write_targets(df: pd.DataFrame, path: Path) -> None:
+    """
+    Write a targets table as CSV, plus a zstd Parquet copy if pyarrow is installed.
+    
+    With pyarrow the CSV comes from its C writer, which quotes string
+    fields (pandas reads them back unchanged). Tables pyarrow cannot type,
+    e.g. object columns mixing numbers and strings, are written as CSV by
+    pandas and get no Parquet copy.
+    
+    Args:
+        df: Table to write
+        path: CSV output path
+    """
+    table = None
+    if HAS_PYARROW:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = None
+    
+    if table is None:
+        df.to_csv(path, index=False)
+        return
+    pa_csv.write_csv(table, path)
+    pq.write_table(table, path.with_suffix(".parquet"), compression="zstd")
+
+
+def _result_table_rows(html: str) -> List[List[str]]:
+    """
+    Cell texts of the data rows in a SwissTargetPrediction result page.
+    
+    Uses lxml's C parser when available (about 10x faster than
+    BeautifulSoup on a result page), otherwise BeautifulSoup.
+    
+    Args:
+        html: Response body
+        
+    Returns:
+        Stripped ``td`` texts for each row after the header row
+    """
+    if not html.strip():
+        return []
+    
+    if HAS_LXML:
+        tables = lxml.html.fromstring(html).xpath('//table[@id="resultTable"]')
+        if not tables:
+            return []
+        return [
+            [td.text_content().strip() for td in row.xpath("./td")]
+            for row in tables[0].xpath(".//tr")[1:]
+        ]
+    
+    from bs4 import BeautifulSoup
+    table = BeautifulSoup(html, "html.parser").find("table", {"id": "resultTable"})
+    if not table:
+        return []
+    return [
+        [td.get_text(strip=True) for td in row.find_all("td")]
+        for row in table.find_all("tr")[1:]
+    ]
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket allowing ``rate`` requests per second.
+    
+    Unlike a fixed sleep after every request, waiting only happens when
+    requests arrive faster than the rate, and the time spent on the
+    request itself counts towards the interval.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, blocking until it is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A negative balance reserves a later slot for this caller
+            self._tokens -= 1.0
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
 
 
 class TargetPredictor:
     """Predicts drug targets for compounds using various services."""
     
+    # Compounds submitted concurrently by predict_all
+    _MAX_WORKERS = 8
+    
     def __init__(self, config: Config):
         """
         Initialize the predictor.
@@ -30,13 +166,36 @@ class TargetPredictor:
         """
         self.config = config
         self.compounds: List[Dict[str, Any]] = []
-        self.predictions: List[Dict[str, Any]] = []
+        # Columnar store: one list per output column, rows aligned by index
+        self.predictions: Dict[str, List[Any]] = {col: [] for col in _PREDICTION_COLUMNS}
+        self._unique_targets: Set[str] = set()
         self._request_delay = 2.0  # Rate limiting for web services
+        self._limiter = _TokenBucket(
+            config.get("api.swisstargetprediction.max_rate", 1.0 / self._request_delay)
+        )
+        self._swiss_cache: Dict[str, List[Tuple[str, str, str, float]]] = {}
+        self._swiss_cache_dir = config.data_dir / "cache" / "swiss"
+        self._swiss_locks: Dict[str, threading.Lock] = {}
+    
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """
+        POST through the rate limiter on the shared session.
+        
+        The session retries 429 and 5xx responses with backoff.
+        
+        Returns:
+            The last response received
+        """
+        self._limiter.acquire()
+        return _HTTP.post(url, **kwargs)
     
     def load_compounds(self, filename: str = "compounds.csv") -> pd.DataFrame:
         """
         Load compounds from saved CSV.
         
+        Only compounds with a SMILES string are kept in ``self.compounds``,
+        since those are the only ones that can be submitted.
+        
         Args:
             filename: CSV filename
             
@@ -47,82 +206,152 @@ class TargetPredictor:
         
         if input_path.exists():
             df = pd.read_csv(input_path)
-            self.compounds = df.to_dict("records")
+            if "smiles" in df.columns:
+                self.compounds = df[df["smiles"].notna()].to_dict("records")
+            else:
+                self.compounds = []
             return df
         else:
             raise FileNotFoundError(f"Compounds file not found: {input_path}")
     
-    def predict_swiss_target(self, smiles: str, compound_name: str = "") -> List[Dict[str, Any]]:
+    @staticmethod
+    def _canonical_smiles(smiles: str) -> str:
+        """RDKit canonical SMILES, or the input unchanged if it cannot be parsed."""
+        if not HAS_RDKIT:
+            return smiles
+        mol = Chem.MolFromSmiles(smiles)
+        return Chem.MolToSmiles(mol) if mol is not None else smiles
+    
+    def _query_swiss(self, smiles: str) -> List[Tuple[str, str, str, float]]:
         """
-        Predict targets using SwissTargetPrediction.
-        
-        Note: SwissTargetPrediction doesn't have a public API, so this
-        simulates the web form submission. For actual use, you may need
-        to use Selenium or submit manually.
+        Submit one SMILES to SwissTargetPrediction and parse the result table.
         
         Args:
             smiles: SMILES string of the compound
-            compound_name: Name of the compound
             
         Returns:
-            List of predicted targets
+            List of (target name, UniProt ID, gene symbol, probability)
         """
         # SwissTargetPrediction URL
         url = "http://www.swisstargetprediction.ch/predict.php"
         
-        targets = []
+        # Submit the form
+        data = {
+            "smiles": smiles,
+            "organism": "Homo sapiens"
+        }
         
-        try:
-            # Submit the form
-            data = {
-                "smiles": smiles,
-                "organism": "Homo sapiens"
-            }
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            
-            response = requests.post(url, data=data, headers=headers, timeout=60)
-            
-            if response.status_code == 200:
-                # Parse the response
-                # Note: The actual parsing depends on the response format
-                # This is a simplified version
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                # Find the results table
-                table = soup.find("table", {"id": "resultTable"})
-                if table:
-                    rows = table.find_all("tr")
-                    for row in rows[1:]:  # Skip header
-                        cols = row.find_all("td")
-                        if len(cols) >= 4:
-                            target_data = {
-                                "compound_name": compound_name,
-                                "compound_smiles": smiles,
-                                "target_name": cols[0].get_text(strip=True),
-                                "target_uniprot": cols[1].get_text(strip=True),
-                                "gene_symbol": cols[2].get_text(strip=True),
-                                "probability": float(cols[3].get_text(strip=True)) if cols[3].get_text(strip=True) else 0,
-                                "source": "SwissTargetPrediction"
-                            }
-                            targets.append(target_data)
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        
+        response = self._post(url, data=data, headers=headers, timeout=60)
+        
+        hits = []
+        if response.status_code == 200:
+            # Parse the response
+            # Note: The actual parsing depends on the response format
+            # This is a simplified version
+            for cols in _result_table_rows(response.text):
+                if len(cols) >= 4:
+                    hits.append((cols[0], cols[1], cols[2], float(cols[3]) if cols[3] else 0))
+        
+        return hits
+    
+    def _cached_swiss(self, smiles: str) -> List[Tuple[str, str, str, float]]:
+        """
+        SwissTargetPrediction hits for a molecule, queried once per structure.
+        
+        Results are keyed by canonical SMILES, so duplicate compounds and
+        different SMILES spellings of one molecule share a single request.
+        They are kept in memory and under ``cache/swiss`` for later runs.
+        
+        Args:
+            smiles: SMILES string of the compound
             
+        Returns:
+            List of (target name, UniProt ID, gene symbol, probability)
+        """
+        canonical = self._canonical_smiles(smiles)
+        # Per-structure lock: concurrent workers with the same molecule wait
+        # for the first request instead of sending their own
+        with self._swiss_locks.setdefault(canonical, threading.Lock()):
+            return self._cached_swiss_locked(smiles, canonical)
+    
+    def _cached_swiss_locked(self, smiles: str, canonical: str) -> List[Tuple[str, str, str, float]]:
+        """Body of ``_cached_swiss``, run while holding the structure's lock."""
+        if canonical in self._swiss_cache:
+            return self._swiss_cache[canonical]
+        
+        cache_path = self._swiss_cache_dir / f"{hashlib.sha1(canonical.encode()).hexdigest()}.json"
+        if cache_path.exists():
+            try:
+                with open(cache_path, "r") as f:
+                    hits = [tuple(hit) for hit in json.load(f)]
+                self._swiss_cache[canonical] = hits
+                return hits
+            except (OSError, ValueError):
+                pass
+        
+        hits = self._query_swiss(smiles)
+        # An empty table may be a transient failure, so only hits are kept
+        if hits:
+            self._swiss_cache[canonical] = hits
+            try:
+                self._swiss_cache_dir.mkdir(parents=True, exist_ok=True)
+                with open(cache_path, "w") as f:
+                    json.dump(hits, f)
+            except OSError:
+                pass
+        return hits
+    
+    def _swiss_hits(self, smiles: str, compound_name: str) -> List[Tuple[str, str, str, float]]:
+        """SwissTargetPrediction hits for one compound; failures are reported and yield []."""
+        try:
+            return self._cached_swiss(smiles)
         except Exception as e:
             print(f"Warning: SwissTargetPrediction failed for {compound_name}: {e}")
             print("Consider using the web interface manually at: http://www.swisstargetprediction.ch/")
+            return []
+    
+    def predict_swiss_target(self, smiles: str, compound_name: str = "") -> List[Dict[str, Any]]:
+        """
+        Predict targets using SwissTargetPrediction.
         
-        return targets
+        Note: SwissTargetPrediction doesn't have a public API, so this
+        simulates the web form submission. For actual use, you may need
+        to use Selenium or submit manually.
+        
+        Args:
+            smiles: SMILES string of the compound
+            compound_name: Name of the compound
+            
+        Returns:
+            List of predicted targets
+        """
+        return [
+            {
+                "compound_name": compound_name,
+                "compound_smiles": smiles,
+                "target_name": target_name,
+                "target_uniprot": uniprot,
+                "gene_symbol": gene_symbol,
+                "probability": probability,
+                "source": "SwissTargetPrediction"
+            }
+            for target_name, uniprot, gene_symbol, probability in self._swiss_hits(smiles, compound_name)
+        ]
     
-    def predict_all(self) -> List[Dict[str, Any]]:
+    def predict_all(self) -> Dict[str, List[Any]]:
         """
         Predict targets for all compounds with SMILES.
         
+        Hits are appended straight into the columns of ``self.predictions``
+        rather than built as one dict per target.
+        
         Returns:
-            All predicted targets
+            All predicted targets as column name -> values
         """
         probability_threshold = self.config.get("analysis.target_probability_threshold", 0.1)
         
@@ -130,18 +359,37 @@ class TargetPredictor:
         
         print(f"Predicting targets for {len(compounds_with_smiles)} compounds...")
         
-        for compound in tqdm(compounds_with_smiles, desc="Predicting targets"):
+        # Requests mostly wait on the server, so several run at once; the
+        # token bucket still caps the request rate
+        results: List[List[Tuple[str, str, str, float]]] = [[] for _ in compounds_with_smiles]
+        with ThreadPoolExecutor(max_workers=self._MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self._swiss_hits, c["smiles"], c.get("name", "Unknown")): i
+                for i, c in enumerate(compounds_with_smiles)
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Predicting targets"):
+                results[futures[future]] = future.result()
+        
+        # Append in input order so the output does not depend on timing
+        columns = self.predictions
+        for compound, hits in zip(compounds_with_smiles, results):
             smiles = compound.get("smiles")
             name = compound.get("name", "Unknown")
             
             if smiles:
-                targets = self.predict_swiss_target(smiles, name)
-                
-                # Filter by probability threshold
-                filtered = [t for t in targets if t.get("probability", 0) >= probability_threshold]
-                self.predictions.extend(filtered)
-                
-                time.sleep(self._request_delay)  # Rate limiting
+                for target_name, uniprot, gene_symbol, probability in hits:
+                    # Filter by probability threshold
+                    if probability < probability_threshold:
+                        continue
+                    columns["compound_name"].append(name)
+                    columns["compound_smiles"].append(smiles)
+                    columns["target_name"].append(target_name)
+                    columns["target_uniprot"].append(uniprot)
+                    columns["gene_symbol"].append(gene_symbol)
+                    columns["probability"].append(probability)
+                    columns["source"].append("SwissTargetPrediction")
+                    if gene_symbol:
+                        self._unique_targets.add(gene_symbol)
         
         return self.predictions
     
@@ -152,20 +400,23 @@ class TargetPredictor:
         Returns:
             DataFrame with target predictions
         """
-        return pd.DataFrame(self.predictions)
+        return pd.DataFrame(self.predictions, copy=False)
     
     def get_unique_targets(self) -> List[str]:
         """
         Get list of unique target gene symbols.
         
+        The set is collected while ``predict_all`` runs, so this does not
+        rescan the predictions.
+        
         Returns:
             List of gene symbols
         """
-        return list(set(p.get("gene_symbol") for p in self.predictions if p.get("gene_symbol")))
+        return list(self._unique_targets)
     
     def save_targets(self, filename: Optional[str] = None) -> Path:
         """
-        Save predictions to CSV.
+        Save predictions to CSV, plus a zstd Parquet copy if pyarrow is installed.
         
         Args:
             filename: Optional custom filename
@@ -173,15 +424,14 @@ class TargetPredictor:
         Returns:
             Path to saved file
         """
-        df = self.get_predictions_df()
-        
         if filename is None:
             filename = "predicted_targets.csv"
         
         output_path = self.config.data_dir / "processed" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        df.to_csv(output_path, index=False)
+        # The CSV is read by the network and plotting steps
+        _write_targets(self.get_predictions_df(), output_path)
         
         # Also save unique targets
         unique_targets = self.get_unique_targets()
@@ -224,9 +474,10 @@ class ManualTargetPrediction:
         output_path = self.config.data_dir / "processed" / output_file
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # One "name<TAB>smiles" line per compound, built as whole columns
+        lines = smiles_df["name"].map(str) + "\t" + smiles_df["smiles"].map(str) + "\n"
         with open(output_path, "w") as f:
-            for _, row in smiles_df.iterrows():
-                f.write(f"{row['name']}\t{row['smiles']}\n")
+            f.write("".join(lines))
         
         return output_path
 
@@ -250,13 +501,20 @@ class SwissTargetParser:
         Parse SwissTargetPrediction results from file.
         
         Args:
-            filepath: Path to results file (txt or csv)
+            filepath: Path to results file (txt or csv), or a directory of
+                them (e.g. one downloaded CSV per compound)
             
         Returns:
             List of target dictionaries
         """
         filepath = Path(filepath)
         
+        if filepath.is_dir():
+            for path in sorted(filepath.iterdir()):
+                if path.suffix.lower() in (".csv", ".txt"):
+                    self.parse_results(path)
+            return self.all_targets
+        
         if filepath.suffix.lower() == ".csv":
             return self._parse_csv(filepath)
         else:
@@ -265,6 +523,8 @@ class SwissTargetParser:
     def _parse_txt(self, filepath: Path) -> List[Dict[str, Any]]:
         """Parse copy-pasted txt results."""
         current_compound = None
+        probability_threshold = self._probability_threshold
+        append = self.all_targets.append
         
         with open(filepath, "r", encoding="utf-8") as f:
             lines = f.readlines()
@@ -276,15 +536,11 @@ class SwissTargetParser:
             if not line:
                 continue
             
-            # Check for compound header (e.g., "SwissTargetPrediction Quercetin")
-            if "SwissTargetPrediction" in line:
-                parts = line.replace("SwissTargetPrediction", "").strip()
-                current_compound = parts if parts else None
-                continue
-            
-            # Also check for compound name pattern at end of header
-            if line.endswith("SwissTargetPrediction"):
-                parts = line.replace("SwissTargetPrediction", "").strip()
+            # Check for compound header, with the name before or after the
+            # marker (e.g., "SwissTargetPrediction Quercetin")
+            before, marker, after = line.partition("SwissTargetPrediction")
+            if marker:
+                parts = (before + after.replace("SwissTargetPrediction", "")).strip()
                 current_compound = parts if parts else None
                 continue
             
@@ -304,8 +560,8 @@ class SwissTargetParser:
                     probability = float(parts[5]) if len(parts) > 5 else 0.0
                     
                     # Apply threshold filter
-                    if probability >= self._probability_threshold:
-                        self.all_targets.append({
+                    if probability >= probability_threshold:
+                        append({
                             "compound_name": current_compound or "Unknown",
                             "target_name": target_full,
                             "gene_symbol": gene_symbol,
@@ -327,30 +583,39 @@ class SwissTargetParser:
         # Get compound name from filename
         compound_name = filepath.stem.replace("_targets", "").replace("-", " ").title()
         
-        for _, row in df.iterrows():
-            probability = row.get("Probability*", row.get("Probability", 0))
-            
-            if probability >= self._probability_threshold:
-                self.all_targets.append({
-                    "compound_name": compound_name,
-                    "target_name": row.get("Target", ""),
-                    "gene_symbol": row.get("Common name", ""),
-                    "uniprot_id": row.get("Uniprot ID", ""),
-                    "chembl_id": row.get("ChEMBL ID", ""),
-                    "target_class": row.get("Target Class", ""),
-                    "probability": probability,
-                    "source": "SwissTargetPrediction"
-                })
+        if "Probability*" in df.columns:
+            probability = df["Probability*"]
+        elif "Probability" in df.columns:
+            probability = df["Probability"]
+        else:
+            probability = pd.Series(0, index=df.index)
+        keep = probability >= self._probability_threshold
+        
+        def column(name: str) -> Any:
+            return df.loc[keep, name] if name in df.columns else ""
+        
+        # Filter and rename as whole columns instead of row by row
+        hits = pd.DataFrame({
+            "compound_name": compound_name,
+            "target_name": column("Target"),
+            "gene_symbol": column("Common name"),
+            "uniprot_id": column("Uniprot ID"),
+            "chembl_id": column("ChEMBL ID"),
+            "target_class": column("Target Class"),
+            "probability": probability[keep],
+            "source": "SwissTargetPrediction"
+        })
+        self.all_targets.extend(hits.to_dict("records"))
         
         return self.all_targets
     
     def save_targets(self, filename: str = "predicted_targets.csv") -> Path:
-        """Save parsed targets to CSV."""
+        """Save parsed targets to CSV, plus a zstd Parquet copy if pyarrow is installed."""
         output_path = self.config.data_dir / "processed" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         df = pd.DataFrame(self.all_targets)
-        df.to_csv(output_path, index=False)
+        _write_targets(df, output_path)
         
         # Also save unique targets list
         unique_targets = df["gene_symbol"].dropna().unique().tolist()
@@ -375,6 +640,9 @@ class STITCHPredictor:
     
     STITCH_API_URL = "http://stitch.embl.de/api"
     
+    # Compounds queried concurrently by predict_all
+    _MAX_WORKERS = 8
+    
     def __init__(self, config: Config):
         """
         Initialize STITCH predictor.
@@ -385,9 +653,20 @@ class STITCHPredictor:
         self.config = config
         self.compounds: List[Dict[str, Any]] = []
         self.predictions: List[Dict[str, Any]] = []
+        self._unique_targets: Set[str] = set()
         self._species = 9606  # Homo sapiens
         self._score_threshold = config.get("analysis.target_probability_threshold", 0.4) * 1000  # STITCH uses 0-1000
         self._request_delay = 1.0
+        self._limiter = _TokenBucket(
+            config.get("api.stitch.max_rate", 1.0 / self._request_delay)
+        )
+        self._stitch_cache: Dict[str, List[Dict[str, Any]]] = {}
+        self._stitch_cache_dir = config.data_dir / "cache" / "stitch"
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the rate limiter on the shared session."""
+        self._limiter.acquire()
+        return _HTTP.get(url, **kwargs)
     
     def load_compounds(self, filename: str = "compounds.csv") -> pd.DataFrame:
         """Load compounds from saved CSV."""
@@ -419,10 +698,10 @@ class STITCHPredictor:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=60)
+            response = self._get(url, params=params, timeout=60)
             
             if response.status_code == 200:
-                return response.json()
+                return decode_json(response)
             else:
                 return []
                 
@@ -430,16 +709,34 @@ class STITCHPredictor:
             print(f"STITCH query failed for {compound_name}: {e}")
             return []
     
-    def _query_stitch_interactions(self, compound_name: str) -> List[Dict[str, Any]]:
+    def _stitch_partners(self, compound_name: str) -> List[Dict[str, Any]]:
         """
-        Get protein interactions for a compound from STITCH.
+        Raw STITCH interaction partners for a compound, queried once.
+        
+        Responses are keyed by compound name, species and score threshold
+        and kept in memory and under ``cache/stitch`` for later runs; delete
+        that directory to force fresh queries.
         
         Args:
             compound_name: Name of the compound
             
         Returns:
-            List of target dictionaries
+            Interaction records as returned by the API
         """
+        key = f"{compound_name}:{self._species}:{int(self._score_threshold)}"
+        if key in self._stitch_cache:
+            return self._stitch_cache[key]
+        
+        cache_path = self._stitch_cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+        if cache_path.exists():
+            try:
+                raw = cache_path.read_bytes()
+                data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+                self._stitch_cache[key] = data
+                return data
+            except (OSError, ValueError):
+                pass
+        
         url = f"{self.STITCH_API_URL}/json/interaction_partners"
         
         params = {
@@ -449,40 +746,64 @@ class STITCHPredictor:
             "limit": 50,
         }
         
+        response = self._get(url, params=params, timeout=60)
+        data = decode_json(response) if response.status_code == 200 else []
+        
+        # An empty answer may be a transient failure, so only hits are kept
+        if data:
+            self._stitch_cache[key] = data
+            try:
+                self._stitch_cache_dir.mkdir(parents=True, exist_ok=True)
+                if HAS_ORJSON:
+                    cache_path.write_bytes(orjson.dumps(data))
+                else:
+                    with open(cache_path, "w") as f:
+                        json.dump(data, f)
+            except OSError:
+                pass
+        return data
+    
+    def _query_stitch_interactions(self, compound_name: str) -> List[Dict[str, Any]]:
+        """
+        Get protein interactions for a compound from STITCH.
+        
+        Args:
+            compound_name: Name of the compound
+            
+        Returns:
+            List of target dictionaries
+        """
         targets = []
         
         try:
-            response = requests.get(url, params=params, timeout=60)
+            data = self._stitch_partners(compound_name)
             
-            if response.status_code == 200:
-                data = response.json()
+            for item in data:
+                # STITCH returns both chemical-protein and protein-protein
+                # We only want chemical-protein interactions
+                string_id_a = item.get("stringId_A", "")
+                string_id_b = item.get("stringId_B", "")
                 
-                for item in data:
-                    # STITCH returns both chemical-protein and protein-protein
-                    # We only want chemical-protein interactions
-                    string_id_a = item.get("stringId_A", "")
-                    string_id_b = item.get("stringId_B", "")
-                    
-                    # Chemical IDs start with "CID" or "s" prefix in STITCH
-                    if string_id_a.startswith("CID") or string_id_a.startswith("s"):
-                        protein_id = string_id_b
-                        protein_name = item.get("preferredName_B", "")
-                    elif string_id_b.startswith("CID") or string_id_b.startswith("s"):
-                        protein_id = string_id_a
-                        protein_name = item.get("preferredName_A", "")
-                    else:
-                        continue  # Skip protein-protein interactions
-                    
-                    target_data = {
-                        "compound_name": compound_name,
-                        "target_name": protein_name,
-                        "gene_symbol": protein_name.upper(),
-                        "string_id": protein_id,
-                        "score": item.get("score", 0) / 1000,  # Normalize to 0-1
-                        "source": "STITCH"
-                    }
-                    targets.append(target_data)
-                    
+                # Chemical IDs start with "CID" or "s" prefix in STITCH
+                if string_id_a.startswith(_STITCH_CHEMICAL_PREFIXES):
+                    protein_id = string_id_b
+                    protein_name = item.get("preferredName_B", "")
+                elif string_id_b.startswith(_STITCH_CHEMICAL_PREFIXES):
+                    protein_id = string_id_a
+                    protein_name = item.get("preferredName_A", "")
+                else:
+                    continue  # Skip protein-protein interactions
+                
+                target_data = {
+                    "compound_name": compound_name,
+                    "target_name": protein_name,
+                    "gene_symbol": protein_name.upper(),
+                    "string_id": protein_id,
+                    "score": item.get("score", 0) / 1000,  # Normalize to 0-1
+                    "source": "STITCH"
+                }
+                targets.append(target_data)
+            
         except Exception as e:
             print(f"STITCH interaction query failed for {compound_name}: {e}")
         
@@ -500,13 +821,24 @@ class STITCHPredictor:
         
         print(f"Querying STITCH for {len(self.compounds)} compounds...")
         
-        for compound in tqdm(self.compounds, desc="STITCH prediction"):
-            name = compound.get("name", "")
-            
-            if name:
-                targets = self._query_stitch_interactions(name)
-                self.predictions.extend(targets)
-                time.sleep(self._request_delay)  # Rate limiting
+        names = [c.get("name", "") for c in self.compounds]
+        names = [name for name in names if name]
+        
+        # Several requests are in flight at once; the token bucket keeps
+        # the overall rate at one request per _request_delay
+        results: List[List[Dict[str, Any]]] = [[] for _ in names]
+        with ThreadPoolExecutor(max_workers=self._MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self._query_stitch_interactions, name): i
+                for i, name in enumerate(names)
+            }
+            for future in tqdm(as_completed(futures), total=len(futures), desc="STITCH prediction"):
+                results[futures[future]] = future.result()
+        
+        # Extend in input order so the output does not depend on timing
+        for targets in results:
+            self.predictions.extend(targets)
+            self._unique_targets.update(t["gene_symbol"] for t in targets if t["gene_symbol"])
         
         print(f"Found {len(self.predictions)} compound-target interactions")
         return self.predictions
@@ -516,11 +848,11 @@ class STITCHPredictor:
         return pd.DataFrame(self.predictions)
     
     def get_unique_targets(self) -> List[str]:
-        """Get list of unique target gene symbols."""
-        return list(set(p.get("gene_symbol") for p in self.predictions if p.get("gene_symbol")))
+        """Get list of unique target gene symbols (collected by ``predict_all``)."""
+        return list(self._unique_targets)
     
     def save_targets(self, filename: Optional[str] = None) -> Path:
-        """Save predictions to CSV."""
+        """Save predictions to CSV, plus a zstd Parquet copy if pyarrow is installed."""
         df = self.get_predictions_df()
         
         if filename is None:
@@ -529,7 +861,7 @@ class STITCHPredictor:
         output_path = self.config.data_dir / "processed" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        df.to_csv(output_path, index=False)
+        _write_targets(df, output_path)
         
         # Also save unique targets
         unique_targets = self.get_unique_targets()
@@ -590,16 +922,21 @@ class CombinedTargetPredictor:
         return list(set(p.get("gene_symbol") for p in self.all_predictions if p.get("gene_symbol")))
     
     def save_all(self, filename: str = "predicted_targets.csv") -> Path:
-        """Save all predictions to CSV."""
+        """Save all predictions to CSV, plus a zstd Parquet copy if pyarrow is installed."""
         df = pd.DataFrame(self.all_predictions)
         
         output_path = self.config.data_dir / "processed" / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        df.to_csv(output_path, index=False)
+        _write_targets(df, output_path)
         
-        # Save unique targets
-        unique_targets = self.get_unique_targets()
+        # Save unique targets, taken from the table just written rather
+        # than another pass over the prediction dicts
+        if "gene_symbol" in df.columns:
+            genes = df["gene_symbol"].dropna()
+            unique_targets = genes[genes != ""].unique().tolist()
+        else:
+            unique_targets = []
         targets_path = self.config.data_dir / "processed" / "unique_targets.txt"
         with open(targets_path, "w") as f:
             f.write("\n".join(unique_targets))
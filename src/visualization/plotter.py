@@ -8,14 +8,319 @@ Creates publication-ready figures for network pharmacology analysis.
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import networkx as nx
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Tuple
+import hashlib
+import heapq
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import xml.etree.ElementTree as ET
+
+try:
+    from scipy.optimize import minimize
+    from scipy.sparse import csgraph
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 from ..config_loader import Config
 
+# Rows of the pairwise repulsion computed at a time by the NumPy kernel
+_REPULSION_BATCH = 500
+
+_GRAPHML_NS = "{http://graphml.graphdrawing.org/xmlns}"
+_GRAPHML_NUMBER_TYPES = {"double": float, "float": float, "int": int, "long": int}
+
+# Figures produced by Plotter.plot_all, in output order
+_PLOT_METHODS = (
+    "plot_compound_target_network",
+    "plot_ppi_network",
+    "plot_venn_diagram",
+    "plot_enrichment_barplot",
+    "plot_enrichment_bubble",
+    "plot_admet_summary",
+)
+
+# Format-specific savefig options. WebP is written lossless so line art and
+# text stay as sharp as the PNG output at roughly half the file size.
+_SAVE_OPTIONS = {
+    "webp": {"pil_kwargs": {"lossless": True}},
+}
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _repulsion(pos: np.ndarray, k2: float) -> Tuple[float, np.ndarray]:
+        """
+        All-pairs FR repulsion energy and gradient, one parallel row per node.
+        
+        The log-distances are summed as the log of products of 8 squared
+        distances, which cuts the (scalar, unvectorised) log calls 8-fold;
+        8 factors in [1e-10, 1e19] stay within float64 range.
+        """
+        n = pos.shape[0]
+        grad = np.empty((n, 2))
+        logs = np.empty(n)
+        for i in prange(n):
+            gx = 0.0
+            gy = 0.0
+            total = 0.0
+            product = 1.0
+            for j in range(n):
+                dx = pos[i, 0] - pos[j, 0]
+                dy = pos[i, 1] - pos[j, 1]
+                d2 = max(dx * dx + dy * dy, 1e-10)
+                product *= d2
+                if (j & 7) == 7:
+                    total += np.log(product)
+                    product = 1.0
+                gx += dx / d2
+                gy += dy / d2
+            grad[i, 0] = -2.0 * k2 * gx
+            grad[i, 1] = -2.0 * k2 * gy
+            logs[i] = total + np.log(product)
+        return -0.5 * k2 * logs.sum(), grad
+else:
+    def _repulsion(pos: np.ndarray, k2: float) -> Tuple[float, np.ndarray]:
+        """All-pairs FR repulsion energy and gradient, in blocks of rows."""
+        n = pos.shape[0]
+        px, py = pos[:, 0], pos[:, 1]
+        grad = np.empty((n, 2))
+        cost = 0.0
+        for start in range(0, n, _REPULSION_BATCH):
+            stop = min(start + _REPULSION_BATCH, n)
+            dx = px[start:stop, None] - px[None, :]
+            dy = py[start:stop, None] - py[None, :]
+            d2 = np.maximum(dx * dx + dy * dy, 1e-10)
+            cost -= 0.5 * k2 * np.log(d2).sum()
+            inv = 1.0 / d2
+            grad[start:stop, 0] = -2.0 * k2 * np.einsum("ij,ij->i", inv, dx)
+            grad[start:stop, 1] = -2.0 * k2 * np.einsum("ij,ij->i", inv, dy)
+        return cost, grad
+
+
+def _read_table(csv_path: Path, columns: Optional[List[str]] = None,
+                nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read a results table, preferring its Parquet copy.
+    
+    The pipeline steps write a zstd Parquet file next to most CSVs they
+    produce; it is used when it is at least as new as the CSV, so a CSV
+    edited by hand still wins.
+    
+    Args:
+        csv_path: Path of the CSV file
+        columns: Columns to load; names missing from the file are ignored
+        nrows: Number of leading rows to keep
+        
+    Returns:
+        The table
+    """
+    wanted = set(columns) if columns is not None else None
+    
+    parquet_path = csv_path.with_suffix(".parquet")
+    if HAS_PYARROW and parquet_path.exists():
+        if parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            if wanted is not None:
+                columns = [c for c in pq.read_schema(parquet_path).names if c in wanted]
+            df = pd.read_parquet(parquet_path, columns=columns)
+            return df if nrows is None else df.head(nrows)
+    
+    usecols = (lambda c: c in wanted) if wanted is not None else None
+    return pd.read_csv(csv_path, usecols=usecols, nrows=nrows)
+
+
+def _spring_layout_lbfgs(
+    G: nx.Graph,
+    k: Optional[float] = None,
+    iterations: int = 50,
+    seed: Optional[int] = None,
+    gravity: float = 1.0
+) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout by L-BFGS minimisation of its energy.
+    
+    Same energy, gradient, start positions and scaling as NetworkX's
+    ``spring_layout(method="energy")``, but attraction is summed over the
+    edge list only instead of multiplying the sparse adjacency into a
+    dense block for every batch of nodes, which is where most of the
+    NetworkX time goes. Repulsion is still all-pairs (``_repulsion``,
+    compiled with Numba when it is installed).
+    
+    Args:
+        G: Graph to lay out ("weight" edge attributes are used if present)
+        k: Optimal distance between nodes; defaults to 1/sqrt(n)
+        iterations: Maximum number of L-BFGS iterations
+        seed: Seed for the random initial positions
+        gravity: Pull of each connected component towards the centre
+        
+    Returns:
+        (n, 2) array of positions in [-1, 1], in ``G.nodes()`` order
+    """
+    nodes = list(G)
+    n = len(nodes)
+    if n == 0:
+        return np.zeros((0, 2))
+    if n == 1:
+        return np.zeros((1, 2))
+    
+    A = abs(nx.to_scipy_sparse_array(G, nodelist=nodes, weight="weight", dtype="f"))
+    A = ((A + A.T) / 2).tocoo()
+    rows, cols, w = A.row, A.col, A.data.astype(np.float64)
+    n_components, labels = csgraph.connected_components(A, directed=False)
+    sizes = np.bincount(labels)
+    
+    pos = np.asarray(np.random.RandomState(seed).rand(n, 2), dtype=np.float32)
+    if k is None:
+        k = np.sqrt(1.0 / n)
+    k2 = k * k
+    
+    def energy(x: np.ndarray) -> Tuple[float, np.ndarray]:
+        p = x.reshape(n, 2)
+        
+        # Repulsion between all pairs (self-pairs have zero offset)
+        cost, grad = _repulsion(p, k2)
+        
+        # Attraction along edges (both directions are stored)
+        delta = p[rows] - p[cols]
+        d2 = np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-10)
+        d = np.sqrt(d2)
+        cost += np.sum(w * d * d2) / (3 * k)
+        force = 2.0 * w * d / k
+        grad[:, 0] += np.bincount(rows, force * delta[:, 0], minlength=n)
+        grad[:, 1] += np.bincount(rows, force * delta[:, 1], minlength=n)
+        
+        # Gravity from component centroids towards (0.5, 0.5)
+        centers = np.zeros((n_components, 2))
+        np.add.at(centers, labels, p)
+        offset = centers / sizes[:, None] - 0.5
+        grad += gravity * offset[labels]
+        cost += gravity * 0.5 * np.sum(sizes * np.linalg.norm(offset, axis=1) ** 2)
+        return cost, grad.ravel()
+    
+    result = minimize(
+        energy, pos.ravel(), method="L-BFGS-B", jac=True,
+        options={"maxiter": iterations, "gtol": 1e-4}
+    )
+    return nx.rescale_layout(result.x.reshape(n, 2), scale=1)
+
+
+def _read_graph_topology(path: Path) -> nx.Graph:
+    """
+    Read the nodes, edges and edge weights of an undirected GraphML file.
+    
+    The network figures need no other attributes, and skipping them is
+    about 4x faster than ``nx.read_graphml``. Node and edge order and the
+    ``weight`` edge data (used by the spring layout) match
+    ``nx.read_graphml``, so layouts are unchanged. Anything other than a
+    plain undirected graph with a numeric weight is handed to
+    ``nx.read_graphml``.
+    """
+    key_tag = _GRAPHML_NS + "key"
+    node_tag = _GRAPHML_NS + "node"
+    edge_tag = _GRAPHML_NS + "edge"
+    data_tag = _GRAPHML_NS + "data"
+    weight_key, weight_type = None, float
+    nodes, edges = [], []
+    
+    try:
+        context = ET.iterparse(path)
+        for _, elem in context:
+            if elem.tag == node_tag:
+                nodes.append(elem.get("id"))
+                elem.clear()
+            elif elem.tag == edge_tag:
+                edge = (elem.get("source"), elem.get("target"), {})
+                if weight_key is not None:
+                    for data in elem.iter(data_tag):
+                        if data.get("key") == weight_key:
+                            edge[2]["weight"] = weight_type(data.text)
+                edges.append(edge)
+                elem.clear()
+            elif elem.tag == key_tag and elem.get("attr.name") == "weight" \
+                    and elem.get("for") in ("edge", "all"):
+                weight_type = _GRAPHML_NUMBER_TYPES.get(elem.get("attr.type"))
+                if weight_type is None:
+                    return nx.read_graphml(path)
+                weight_key = elem.get("id")
+        graph = context.root.find(_GRAPHML_NS + "graph")
+    except (ET.ParseError, TypeError, ValueError):
+        return nx.read_graphml(path)
+    
+    if graph is None or graph.get("edgedefault") != "undirected":
+        return nx.read_graphml(path)
+    
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    return G
+
+
+def _neg_log10(pvalues: pd.Series) -> np.ndarray:
+    """-log10 of p-values floored at 1e-50, computed in place on one array."""
+    values = np.clip(pvalues.to_numpy(dtype=float), 1e-50, None)
+    np.log10(values, out=values)
+    np.negative(values, out=values)
+    return values
+
+
+def _spring_layout(G: nx.Graph, k: Optional[float] = None, seed: Optional[int] = None) -> np.ndarray:
+    """Spring layout for the network figures as an (n, 2) array, via L-BFGS when SciPy is available."""
+    if HAS_SCIPY:
+        return _spring_layout_lbfgs(G, k=k, iterations=50, seed=seed)
+    pos = nx.spring_layout(G, k=k, iterations=50, seed=seed)
+    return np.array([pos[n] for n in G.nodes()]).reshape(-1, 2)
+
+
+def _draw_edges(ax: Any, G: nx.Graph, xy: np.ndarray, color: str, alpha: float) -> Optional[LineCollection]:
+    """
+    Draw the edges of an undirected graph as one LineCollection.
+    
+    Matches ``nx.draw_networkx_edges`` for graphs without self-loops, but
+    gathers the segments with one fancy-index into the position array
+    (rows in ``G.nodes()`` order) instead of a dict lookup per edge end.
+    """
+    n_edges = G.number_of_edges()
+    if n_edges == 0:
+        return None
+    
+    index = dict(zip(G.nodes(), range(len(xy))))
+    ends = np.fromiter((index[n] for edge in G.edges() for n in edge),
+                       dtype=np.intp, count=2 * n_edges).reshape(-1, 2)
+    segments = xy[ends]
+    
+    edges = LineCollection(segments, colors=color, linewidths=1.0,
+                           antialiaseds=(1,), linestyle="solid", alpha=alpha)
+    edges.set_zorder(1)  # edges go behind nodes
+    ax.add_collection(edges, autolim=False)  # limits are set below
+    
+    # Same 5% padding around the edges as networkx
+    lo = segments.min(axis=(0, 1))
+    hi = segments.max(axis=(0, 1))
+    pad = 0.05 * (hi - lo)
+    ax.update_datalim((lo - pad, hi + pad))
+    ax.autoscale_view()
+    
+    return edges
+
 
 class Plotter:
     """Creates publication-ready visualizations."""
@@ -28,6 +333,7 @@ class Plotter:
             config: Configuration object
         """
         self.config = config
+        self._layout_cache_dir = config.data_dir / "cache" / "layouts"
         self._setup_style()
     
     def _setup_style(self):
@@ -59,17 +365,79 @@ class Plotter:
             'figure.figsize': (8, 6),
         })
     
-    def _save_figure(self, fig: plt.Figure, name: str) -> Path:
-        """Save figure to output directory."""
+    @staticmethod
+    def _subplots(*args, figsize: Optional[Tuple[float, float]] = None, **kwargs) -> Tuple[Figure, Any]:
+        """
+        Like ``plt.subplots``, but the figure is not registered with pyplot.
+        
+        Figures are only ever saved to file, so there is no need for a
+        canvas of the active (possibly interactive) backend or for closing
+        them afterwards; ``savefig`` renders with Agg regardless.
+        """
+        fig = Figure(figsize=figsize)
+        return fig, fig.subplots(*args, **kwargs)
+    
+    def _save_figure(self, fig: Figure, name: str, dpi: Optional[float] = None) -> Path:
+        """
+        Save figure to output directory.
+        
+        Args:
+            fig: Figure to save
+            name: File name without extension
+            dpi: Resolution override; defaults to output.figure_dpi
+            
+        Returns:
+            Path to saved figure
+        """
         fmt = self.config.get("output.figure_format", "png")
         output_path = self.config.figures_dir / f"{name}.{fmt}"
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        fig.savefig(output_path, bbox_inches='tight', facecolor='white')
-        plt.close(fig)
+        fig.savefig(output_path, bbox_inches='tight', facecolor='white',
+                    dpi=dpi, **_SAVE_OPTIONS.get(fmt, {}))
         
         return output_path
     
+    def _layout_cache_path(self, G: nx.Graph, k: Optional[float], seed: Optional[int]) -> Path:
+        """Cache file for one graph / layout parameter combination."""
+        # Node and edge order and the edge weights all feed the layout, so they are part of the key
+        h = hashlib.sha1(f"{k}:{seed}:{HAS_SCIPY}".encode())
+        h.update("\n".join(map(str, G.nodes())).encode())
+        h.update("\n".join(f"{u}\t{v}\t{w!r}" for u, v, w in G.edges(data="weight")).encode())
+        return self._layout_cache_dir / f"{h.hexdigest()}.npy"
+    
+    def _cached_spring_layout(self, G: nx.Graph, k: Optional[float] = None,
+                              seed: Optional[int] = None) -> np.ndarray:
+        """
+        Spring layout, reusing positions cached on disk from an earlier run.
+        
+        Args:
+            G: Graph to lay out
+            k: Optimal node distance
+            seed: Random seed for the initial positions
+            
+        Returns:
+            float32 (n, 2) array of positions, rows in ``G.nodes()`` order
+        """
+        cache_path = self._layout_cache_path(G, k, seed)
+        if cache_path.exists():
+            try:
+                xy = np.load(cache_path, allow_pickle=False)
+                if xy.shape == (G.number_of_nodes(), 2):
+                    return xy.astype(np.float32, copy=False)
+            except (OSError, ValueError):
+                pass
+        
+        xy = _spring_layout(G, k=k, seed=seed).astype(np.float32)
+        
+        try:
+            self._layout_cache_dir.mkdir(parents=True, exist_ok=True)
+            np.save(cache_path, xy)
+        except OSError:
+            pass
+        
+        return xy
+    
     def plot_compound_target_network(self) -> Optional[Path]:
         """
         Plot bipartite compound-target network.
@@ -83,7 +451,7 @@ class Plotter:
             print("Predicted targets file not found.")
             return None
         
-        df = pd.read_csv(targets_path)
+        df = _read_table(targets_path, columns=["compound_name", "gene_symbol"])
         
         # Build network
         G = nx.Graph()
@@ -91,40 +459,50 @@ class Plotter:
         compounds = df["compound_name"].dropna().unique()
         targets = df["gene_symbol"].dropna().unique()
         
-        for compound in compounds:
-            G.add_node(compound, node_type="compound")
+        G.add_nodes_from(compounds, node_type="compound")
+        G.add_nodes_from(targets, node_type="target")
         
-        for target in targets:
-            G.add_node(target, node_type="target")
+        # Same node order and types as the graph, without walking its node data
+        node_types = dict.fromkeys(compounds, "compound")
+        node_types.update(dict.fromkeys(targets, "target"))
         
-        for _, row in df.iterrows():
-            if pd.notna(row.get("compound_name")) and pd.notna(row.get("gene_symbol")):
-                G.add_edge(row["compound_name"], row["gene_symbol"])
+        linked = df["compound_name"].notna() & df["gene_symbol"].notna()
+        G.add_edges_from(
+            df.loc[linked, ["compound_name", "gene_symbol"]].itertuples(index=False, name=None)
+        )
         
         # Create figure
-        fig, ax = plt.subplots(figsize=(12, 10))
+        fig, ax = self._subplots(figsize=(12, 10))
         
-        # Layout
-        pos = nx.spring_layout(G, k=2, iterations=50, seed=42)
+        # Layout, rows in node order
+        xy = self._cached_spring_layout(G, k=2, seed=42)
+        is_compound = np.fromiter((t == "compound" for t in node_types.values()),
+                                  dtype=bool, count=len(node_types))
+        n_compounds = int(is_compound.sum())
+        n_targets = len(node_types) - n_compounds
         
         # Draw compounds (circles)
-        compound_nodes = [n for n, d in G.nodes(data=True) if d.get("node_type") == "compound"]
-        nx.draw_networkx_nodes(G, pos, nodelist=compound_nodes, 
-                               node_color=self.colors["primary"],
-                               node_size=500, alpha=0.8, ax=ax)
+        compound_xy = xy[is_compound]
+        ax.scatter(compound_xy[:, 0], compound_xy[:, 1], s=500, c=self.colors["primary"],
+                   marker='o', alpha=0.8, zorder=2)
         
         # Draw targets (squares using scatter)
-        target_nodes = [n for n, d in G.nodes(data=True) if d.get("node_type") == "target"]
-        target_pos = {n: pos[n] for n in target_nodes}
-        for node, (x, y) in target_pos.items():
-            ax.scatter(x, y, s=300, c=self.colors["secondary"], marker='s', alpha=0.7, zorder=2)
+        target_xy = xy[~is_compound]
+        ax.scatter(target_xy[:, 0], target_xy[:, 1], s=300, c=self.colors["secondary"],
+                   marker='s', alpha=0.7, zorder=2)
         
         # Draw edges
-        nx.draw_networkx_edges(G, pos, alpha=0.3, 
-                               edge_color=self.colors["network_edge"], ax=ax)
+        _draw_edges(ax, G, xy, self.colors["network_edge"], alpha=0.3)
         
-        # Labels
-        nx.draw_networkx_labels(G, pos, font_size=7, ax=ax)
+        # Labels, for the best-connected nodes only on large networks
+        top_k = self.config.get("output.label_top_k", 30)
+        if top_k is None or G.number_of_nodes() <= top_k:
+            labeled = set(G.nodes())
+        else:
+            labeled = {node for node, _ in heapq.nlargest(top_k, G.degree(), key=lambda nd: nd[1])}
+        label_pos = {node: p for node, p in zip(G.nodes(), xy) if node in labeled}
+        nx.draw_networkx_labels(G, label_pos, labels={node: node for node in label_pos},
+                                font_size=7, ax=ax)
         
         ax.set_title(f"Compound-Target Network\n{self.config.plant_name}", fontsize=14, fontweight='bold')
         ax.axis('off')
@@ -132,8 +510,8 @@ class Plotter:
         # Legend
         from matplotlib.patches import Patch
         legend_elements = [
-            Patch(facecolor=self.colors["primary"], label=f'Compounds ({len(compound_nodes)})'),
-            Patch(facecolor=self.colors["secondary"], label=f'Targets ({len(target_nodes)})'),
+            Patch(facecolor=self.colors["primary"], label=f'Compounds ({n_compounds})'),
+            Patch(facecolor=self.colors["secondary"], label=f'Targets ({n_targets})'),
         ]
         ax.legend(handles=legend_elements, loc='upper left')
         
@@ -153,40 +531,38 @@ class Plotter:
             print("Network file not found.")
             return None
         
-        G = nx.read_graphml(network_path)
+        G = _read_graph_topology(network_path)
         
         # Load hub genes
         hub_genes = []
         if hub_path.exists():
-            hub_df = pd.read_csv(hub_path)
+            hub_df = _read_table(hub_path, columns=["gene"], nrows=10)
             hub_genes = hub_df["gene"].tolist()[:10]  # Top 10
         
-        fig, ax = plt.subplots(figsize=(12, 10))
+        fig, ax = self._subplots(figsize=(12, 10))
         
-        # Layout
-        pos = nx.spring_layout(G, k=1.5, iterations=50, seed=42)
+        # Layout, rows in node order
+        xy = self._cached_spring_layout(G, k=1.5, seed=42)
         
         # Node sizes based on degree
-        degrees = dict(G.degree())
-        node_sizes = [degrees.get(n, 1) * 50 + 100 for n in G.nodes()]
+        node_sizes = np.fromiter((d for _, d in G.degree()), dtype=float,
+                                 count=G.number_of_nodes()) * 50 + 100
         
         # Node colors - highlight hub genes
-        node_colors = []
-        for node in G.nodes():
-            if node in hub_genes:
-                node_colors.append(self.colors["accent"])
-            else:
-                node_colors.append(self.colors["network_node"])
+        hub_set = set(hub_genes)
+        node_colors = [self.colors["accent"] if node in hub_set else self.colors["network_node"]
+                       for node in G.nodes()]
         
         # Draw
-        nx.draw_networkx_edges(G, pos, alpha=0.2, 
-                               edge_color=self.colors["network_edge"], ax=ax)
-        nx.draw_networkx_nodes(G, pos, node_color=node_colors, 
-                               node_size=node_sizes, alpha=0.8, ax=ax)
+        _draw_edges(ax, G, xy, self.colors["network_edge"], alpha=0.2)
+        ax.scatter(xy[:, 0], xy[:, 1], s=node_sizes, c=node_colors,
+                   marker='o', alpha=0.8, zorder=2)
         
         # Label hub genes only
-        hub_labels = {n: n for n in hub_genes if n in G.nodes()}
-        nx.draw_networkx_labels(G, pos, labels=hub_labels, font_size=8, 
+        index = dict(zip(G.nodes(), range(len(xy))))
+        hub_labels = {n: n for n in hub_genes if n in index}
+        hub_pos = {n: xy[index[n]] for n in hub_labels}
+        nx.draw_networkx_labels(G, hub_pos, labels=hub_labels, font_size=8, 
                                 font_weight='bold', ax=ax)
         
         ax.set_title(f"PPI Network - {self.config.disease_name}\n({G.number_of_nodes()} nodes, {G.number_of_edges()} edges)", 
@@ -229,7 +605,7 @@ class Plotter:
         disease_only = len(venn_data.get("disease_genes_only", []))
         common = len(venn_data.get("common", []))
         
-        fig, ax = plt.subplots(figsize=(8, 8))
+        fig, ax = self._subplots(figsize=(8, 8))
         
         venn = venn2(subsets=(drug_only, disease_only, common),
                      set_labels=(f'Drug Targets\n({drug_only + common})', 
@@ -265,7 +641,7 @@ class Plotter:
             print("KEGG enrichment results not found.")
             return None
         
-        df = pd.read_csv(kegg_path)
+        df = _read_table(kegg_path, columns=["Term", "Adjusted P-value", "P-value", "Combined Score"], nrows=15)
         
         # Get top pathways
         top_n = min(15, len(df))
@@ -273,9 +649,9 @@ class Plotter:
         
         # Clean term names
         if "Term" in df_top.columns:
-            df_top["Term"] = df_top["Term"].apply(lambda x: x.split("(")[0].strip() if pd.notna(x) else x)
+            df_top["Term"] = df_top["Term"].str.split("(", n=1).str[0].str.strip()
         
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._subplots(figsize=(10, 8))
         
         # Bar plot
         y_pos = range(len(df_top))
@@ -283,7 +659,7 @@ class Plotter:
         # Use -log10(p-value) or Adjusted P-value
         pval_col = "Adjusted P-value" if "Adjusted P-value" in df_top.columns else "P-value"
         if pval_col in df_top.columns:
-            values = -np.log10(df_top[pval_col].clip(lower=1e-50))
+            values = _neg_log10(df_top[pval_col])
             xlabel = "-log10(Adjusted P-value)"
         else:
             values = df_top.get("Combined Score", range(len(df_top)))
@@ -299,7 +675,7 @@ class Plotter:
         ax.set_title(f"Top KEGG Pathways\n{self.config.plant_name} - {self.config.disease_name}",
                      fontsize=14, fontweight='bold')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         return self._save_figure(fig, "kegg_barplot")
     
@@ -316,42 +692,45 @@ class Plotter:
             print("Combined pathways file not found.")
             return None
         
-        df = pd.read_csv(combined_path)
+        df = _read_table(combined_path)
         
         if len(df) == 0:
             return None
         
-        fig, ax = plt.subplots(figsize=(12, 8))
+        fig, ax = self._subplots(figsize=(12, 8))
         
         # Prepare data
         if "Adjusted P-value" in df.columns:
-            df["neg_log_pval"] = -np.log10(df["Adjusted P-value"].clip(lower=1e-50))
+            df["neg_log_pval"] = _neg_log10(df["Adjusted P-value"])
         else:
             df["neg_log_pval"] = 1
         
         if "Overlap" in df.columns:
             # Parse overlap (e.g., "5/100")
             try:
-                df["gene_count"] = df["Overlap"].apply(lambda x: int(str(x).split("/")[0]) if pd.notna(x) else 1)
-            except:
+                hits = df["Overlap"].astype(str).str.split("/", n=1).str[0]
+                df["gene_count"] = hits.where(df["Overlap"].notna(), "1").astype(int)
+            except (ValueError, TypeError):
                 df["gene_count"] = 1
         else:
             df["gene_count"] = 10
         
         # Color by source
-        sources = df["source"].unique() if "source" in df.columns else ["KEGG"]
-        color_map = {s: plt.cm.Set2(i) for i, s in enumerate(sources)}
-        df["color"] = df.get("source", "KEGG").map(color_map)
+        if "source" in df.columns:
+            source_codes, sources = pd.factorize(df["source"])
+        else:
+            source_codes, sources = np.zeros(len(df), dtype=np.intp), ["KEGG"]
         
-        # Plot
+        # Plot; one vectorised colormap lookup gives the RGBA array
         scatter = ax.scatter(df["neg_log_pval"], range(len(df)),
                             s=df["gene_count"] * 20,
-                            c=df["color"],
+                            c=plt.cm.Set2(source_codes),
                             alpha=0.7)
         
         ax.set_yticks(range(len(df)))
         term_col = "Term" if "Term" in df.columns else df.columns[0]
-        labels = df[term_col].apply(lambda x: str(x)[:50] + "..." if len(str(x)) > 50 else str(x))
+        terms = df[term_col].astype(str)
+        labels = terms.where(terms.str.len() <= 50, terms.str.slice(0, 50) + "...")
         ax.set_yticklabels(labels)
         ax.invert_yaxis()
         
@@ -361,10 +740,10 @@ class Plotter:
         
         # Legend for sources
         from matplotlib.patches import Patch
-        legend_elements = [Patch(facecolor=color_map[s], label=s) for s in sources]
+        legend_elements = [Patch(facecolor=plt.cm.Set2(i), label=s) for i, s in enumerate(sources)]
         ax.legend(handles=legend_elements, loc='lower right', title='Source')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         return self._save_figure(fig, "enrichment_bubble")
     
@@ -381,9 +760,9 @@ class Plotter:
             print("ADMET predictions not found.")
             return None
         
-        df = pd.read_csv(admet_path)
+        df = _read_table(admet_path, columns=["drug_like", "lipinski_violations"])
         
-        fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+        fig, axes = self._subplots(1, 2, figsize=(12, 5))
         
         # Pie chart for drug-likeness
         if "drug_like" in df.columns:
@@ -407,8 +786,8 @@ class Plotter:
             axes[1].set_title("Lipinski Rule Violations", fontsize=12, fontweight='bold')
             axes[1].set_xticks(range(5))
         
-        plt.suptitle(f"ADMET Summary - {self.config.plant_name}", fontsize=14, fontweight='bold', y=1.02)
-        plt.tight_layout()
+        fig.suptitle(f"ADMET Summary - {self.config.plant_name}", fontsize=14, fontweight='bold', y=1.02)
+        fig.tight_layout()
         
         return self._save_figure(fig, "admet_summary")
     
@@ -416,38 +795,25 @@ class Plotter:
         """
         Generate all visualizations.
         
+        The figures are independent, so on multi-core machines each one is
+        rendered in its own process.
+        
         Returns:
             List of saved figure paths
         """
-        paths = []
-        
-        # Compound-target network
-        path = self.plot_compound_target_network()
-        if path:
-            paths.append(path)
-        
-        # PPI network
-        path = self.plot_ppi_network()
-        if path:
-            paths.append(path)
-        
-        # Venn diagram
-        path = self.plot_venn_diagram()
-        if path:
-            paths.append(path)
-        
-        # Enrichment
-        path = self.plot_enrichment_barplot()
-        if path:
-            paths.append(path)
-        
-        path = self.plot_enrichment_bubble()
-        if path:
-            paths.append(path)
-        
-        # ADMET
-        path = self.plot_admet_summary()
-        if path:
-            paths.append(path)
-        
-        return paths
+        n_workers = min(len(_PLOT_METHODS), os.cpu_count() or 1)
+        
+        if n_workers <= 1:
+            results = [getattr(self, name)() for name in _PLOT_METHODS]
+        else:
+            # spawn: forked children would inherit matplotlib/numba state
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as executor:
+                results = list(executor.map(_run_plot, repeat(type(self)), repeat(self.config), _PLOT_METHODS))
+        
+        return [path for path in results if path]
+
+
+def _run_plot(plotter_cls: type, config: Config, name: str) -> Optional[Path]:
+    """Render one figure in a worker process; module level so it can be pickled."""
+    return getattr(plotter_cls(config), name)()